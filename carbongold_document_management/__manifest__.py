@@ -33,10 +33,13 @@ Benefits:
     "data": [
         "security/ir.model.access.csv",
         "data/website_data.xml",
+        "data/ir_cron_data.xml",
         "views/documents_document.xml",
         "views/document_review_views.xml",
         "views/document_template_views.xml",
         "views/category_category_views.xml",
+        "views/document_analytics_views.xml",
+        "views/document_import_views.xml",
     ],
     "assets": {
         "web.assets_frontend": [
@@ -46,7 +49,7 @@ Benefits:
             "carbongold_document_management/static/src/scss/**/*.scss",
             "carbongold_document_management/static/src/category/**",
         ],
-        "web.assets_backend":[
+        "web.assets_backend": [
             "carbongold_document_management/static/src/inspector/**/*",
         ],
     },
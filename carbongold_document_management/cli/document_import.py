@@ -0,0 +1,78 @@
+# Part of Odoo. See LICENSE file for full copyright and licensing details.
+
+import argparse
+import logging
+import os
+import sys
+
+import odoo
+from odoo.cli import Command
+
+
+_logger = logging.getLogger(__name__)
+
+
+class DocumentImport(Command):
+    """Bulk import documents from a directory or a ZIP archive into the portal"""
+
+    name = "document_import"
+
+    def run(self, cmdargs):
+        parser = argparse.ArgumentParser(
+            prog=f"{sys.argv[0].split(os.path.sep)[-1]} {self.name}", description=self.__doc__
+        )
+        parser.add_argument("-c", "--config", help="configuration file of the server")
+        parser.add_argument("-d", "--database", required=True, help="database to import the documents into")
+        parser.add_argument("source", nargs="?", help="directory or ZIP archive to import")
+        parser.add_argument("--resume", type=int, metavar="IMPORT_ID", help="resume the interrupted import IMPORT_ID")
+        parser.add_argument("--workspace", type=int, metavar="FOLDER_ID", help="workspace of the imported documents")
+        parser.add_argument("--publish", action="store_true", help="publish the imported documents")
+        parser.add_argument("--batch-size", type=int, default=200, help="files imported per transaction")
+        parser.add_argument(
+            "--thumbnail-workers",
+            type=int,
+            default=os.cpu_count(),
+            metavar="N",
+            help="processes the thumbnails are generated in, 0 to leave them to the cron",
+        )
+        args = parser.parse_args(cmdargs)
+        if not args.source and not args.resume:
+            parser.error("give the source to import or the import to resume")
+
+        odoo.tools.config.parse_config(["-c", args.config] if args.config else [])
+        odoo.tools.config["db_name"] = args.database
+        registry = odoo.modules.registry.Registry(args.database)
+        with registry.cursor() as cr:
+            env = odoo.api.Environment(cr, odoo.SUPERUSER_ID, {})
+            if args.resume:
+                document_import = env["document.import"].browse(args.resume).exists()
+                if not document_import:
+                    parser.error(f"no import {args.resume}")
+            else:
+                source = os.path.abspath(args.source)
+                vals = {
+                    "name": os.path.basename(source.rstrip(os.sep)),
+                    "source_type": "directory" if os.path.isdir(source) else "zip",
+                    "source_path": source,
+                    "publish": args.publish,
+                    "batch_size": args.batch_size,
+                }
+                if args.workspace:
+                    vals["folder_id"] = args.workspace
+                document_import = env["document.import"].create(vals)
+            document_import.state = "queued"
+            cr.commit()
+            _logger.info(
+                "Running document import %s, resume it with --resume %s", document_import.id, document_import.id
+            )
+            document_import._process(auto_commit=True)
+            _logger.info(
+                "Document import %s %s: %s documents imported, %s files skipped",
+                document_import.id,
+                document_import.state,
+                document_import.imported_count,
+                document_import.skipped_count,
+            )
+            if document_import.state == "done" and args.thumbnail_workers:
+                env["documents.document"]._cron_generate_thumbnail_variants(workers=args.thumbnail_workers)
+            cr.commit()
@@ -1,84 +1,207 @@
 # Part of Odoo. See LICENSE file for full copyright and licensing details.
 
 import base64
+import hashlib
 import json
-from odoo import http
-from odoo.exceptions import UserError
+from datetime import timezone
+
+from werkzeug.exceptions import BadRequest
+from werkzeug.http import http_date
+
+from odoo import _, http
+from odoo.exceptions import AccessError, UserError
 from odoo.http import content_disposition, request
 from odoo.osv import expression
 
+from odoo.addons.carbongold_document_management.models.document_upload_session import ALLOWED_EXTENSIONS
+from odoo.addons.carbongold_document_management.models.documents_document import LISTING_SORTS
+from odoo.addons.carbongold_document_management.utils import THUMBNAIL_VARIANTS, iter_zip
 from odoo.addons.portal.controllers.portal import pager as website_pager
-from odoo.tools import image_process
-from base64 import b64decode
-
-
-ALLOWED_EXTENSIONS = {
-    ".pdf",
-    ".doc",
-    ".docx",
-    ".pptx",
-    ".xls",
-    ".xlsx",
-    ".csv",
-    ".txt",
-    ".jpg",
-    ".jpeg",
-    ".png",
-    ".webp",
-    ".zip",
-}
+
+
+# size of the parts sent by the chunked upload, well below the request size limit
+UPLOAD_CHUNK_SIZE = 8 * 1024 * 1024
+
+# documents per page of the portal listing, and per batch of the infinite scroll
+LISTING_PAGE_SIZE = 20
+
+# suggestions of the typeahead by default, and at most
+SUGGESTION_LIMIT = 8
+SUGGESTION_MAX_LIMIT = 20
+
+# seconds shared caches may serve the public pages without revalidating them
+DEFAULT_CDN_MAX_AGE = 300
+
+# documents and megabytes a ZIP bundle holds at most, unless configured otherwise
+DEFAULT_BUNDLE_MAX_FILES = 100
+DEFAULT_BUNDLE_MAX_SIZE = 500
 
 
 class DocumentController(http.Controller):
     @http.route(["/documents", "/documents/page/<int:page>"], type="http", auth="public", website=True, sitemap=True)
-    def documents(self, category_ids=None, page=1, search="", view_type="grid", **kwargs):
+    def documents(self, category_ids=None, page=1, search="", view_type="grid", cursor=None, sort="recent", **kwargs):
         if category_ids is None:
             category_ids = []
-        documents_per_page = 20
-        domain = [("is_published", "!=", False)]
-
-        if search:
-            domain += [("name", "ilike", search)]
-
+        if sort not in LISTING_SORTS:
+            sort = "recent"
+        documents_per_page = LISTING_PAGE_SIZE
         if category_ids:
             if isinstance(category_ids, str):
                 category_ids = [int(x) for x in request.httprequest.args.getlist("category_ids")]
             else:
                 category_ids = [int(category_ids)]
-            domain = expression.AND([domain, [("document_category_ids", "in", category_ids)]])
-
-        document_count = request.env["documents.document"].sudo().search_count(domain)
+        domain = self._get_listing_domain(category_ids, search)
+
+        Document = request.env["documents.document"].sudo()
+        Category = request.env["category.category"].sudo()
+        validators = None
+        if request.env.user._is_public():
+            validators = self._get_cache_validators(*Document._get_listing_validators(sort))
+            if self._is_not_modified(*validators):
+                return self._make_not_modified_response(*validators)
+
+        cache_key = (request.website.id, request.lang.code, repr(domain))
+        document_count = Document._get_portal_cached(("count", *cache_key), lambda: Document._estimate_count(domain))
         pager = website_pager(
             url="/documents",
             total=document_count,
             page=page,
             step=documents_per_page,
             scope=20,
-            url_args={"category_ids": category_ids, "search": search, "view_type": view_type},
+            url_args={"category_ids": category_ids, "search": search, "view_type": view_type, "sort": sort},
         )
-
-        documents = (
-            request.env["documents.document"]
-            .sudo()
-            .search(
-                domain,
-                order="write_date DESC",
-                limit=documents_per_page,
-                offset=pager["offset"],
-            )
+        sort_key = (sort, Document._get_sort_generation(sort))
+        listing = Document._get_portal_cached(
+            ("listing", *cache_key, *sort_key, pager["offset"], cursor),
+            lambda: self._search_documents(category_ids, search, sort, cursor, pager["offset"], documents_per_page),
+        )
+        category_data = Document._get_portal_cached(
+            ("categories", request.website.id, request.lang.code), self._get_category_data
         )
         values = {
-            "documents": documents,
+            "documents": Document.browse(listing["document_ids"]),
             "pager": pager,
             "search": search,
             "view_type": view_type,
-            "categories": request.env["category.category"].sudo().search([]),
-            "parent_categories": request.env["category.category"].sudo().search([("parent_id", "=", False)]),
+            "sort": sort,
+            "sorts": self._get_listing_sort_labels(),
+            "categories": Category.browse(category_data["category_ids"]),
+            "parent_categories": Category.browse(category_data["parent_category_ids"]),
             "search_count": document_count,
+            "cursor": cursor,
+            "previous_cursor": listing["previous_cursor"],
+            "next_cursor": listing["next_cursor"],
+            "next_offset": self._get_next_offset(search, pager["offset"], documents_per_page, document_count),
             "selected_categories": category_ids,
-            "category_props": {"all_cat_ids" : request.env["category.category"].sudo().search_read([], ["id", "name"], order="name")}
+            "category_counts": Document._get_category_counts(domain),
+            "category_props": {"all_cat_ids": category_data["all_categories"]},
+        }
+        if request.env.user._is_public():
+            # Anonymous visitors all see the same listing and sidebar: render
+            # them once per cache generation, the page layout stays per request.
+            fragment_key = (*cache_key, Document._get_portal_template_token(), tuple(category_ids), view_type, sort)
+            values["categories_html"] = Document._get_portal_cached(
+                ("categories_html", *fragment_key),
+                lambda: self._render_fragment("carbongold_document_management.document_categories_list", values),
+            )
+            values["listing_html"] = Document._get_portal_cached(
+                ("listing_html", *fragment_key, sort_key[1], pager["page"], cursor),
+                lambda: self._render_fragment("carbongold_document_management.documents_listing", values),
+            )
+        response = request.render("carbongold_document_management.all_documents", values)
+        return self._set_cache_headers(response, validators)
+
+    @http.route("/documents/cache/stats", type="json", auth="user")
+    def documents_cache_stats(self):
+        """Hit and miss statistics of the portal cache of this worker, for administrators only."""
+        if not request.env.user._is_system():
+            raise AccessError(_("Only administrators can read the cache statistics."))
+        return request.env["documents.document"]._get_portal_cache_stats()
+
+    @http.route("/documents/listing", type="json", auth="public", website=True)
+    def documents_listing(self, category_ids=None, search="", cursor=None, offset=0, sort="recent"):
+        """Return a page of the listing as compact cards, for the in-place filters and the infinite scroll.
+
+        Pages of a search are reached by ``offset``, the others by ``cursor``.
+        """
+        category_ids = [int(category_id) for category_id in category_ids or []]
+        if sort not in LISTING_SORTS:
+            sort = "recent"
+        offset = int(offset or 0)
+        domain = self._get_listing_domain(category_ids, search)
+        Document = request.env["documents.document"].sudo()
+        cache_key = (request.website.id, request.lang.code, repr(domain))
+        document_count = Document._get_portal_cached(("count", *cache_key), lambda: Document._estimate_count(domain))
+        sort_key = (sort, Document._get_sort_generation(sort))
+        listing = Document._get_portal_cached(
+            ("listing", *cache_key, *sort_key, offset, cursor),
+            lambda: self._search_documents(category_ids, search, sort, cursor, offset, LISTING_PAGE_SIZE),
+        )
+        cards = Document._get_portal_cached(
+            ("cards", *cache_key, *sort_key, offset, cursor),
+            lambda: Document.browse(listing["document_ids"])._get_listing_cards(),
+        )
+        return {
+            "cards": cards,
+            "count": document_count,
+            "next_cursor": listing["next_cursor"],
+            "next_offset": self._get_next_offset(search, offset, LISTING_PAGE_SIZE, document_count),
         }
-        return request.render("carbongold_document_management.all_documents", values)
+
+    @http.route("/documents/suggest", type="http", auth="public", methods=["GET"], website=True, sitemap=False)
+    def documents_suggest(self, term="", limit=SUGGESTION_LIMIT, **kwargs):
+        """Typeahead of the documents search box, answered from an in-memory index."""
+        try:
+            limit = int(limit)
+        except ValueError:
+            limit = SUGGESTION_LIMIT
+        limit = min(max(limit, 1), SUGGESTION_MAX_LIMIT)
+        suggestions = request.env["documents.document"]._get_suggestions(term, limit=limit)
+        return request.make_json_response(suggestions, headers=[("Cache-Control", "public, max-age=60")])
+
+    def _get_listing_sort_labels(self):
+        # searches are sorted by relevance, these only apply to the listing itself
+        return {"recent": _("Newest"), "popular": _("Most Popular"), "trending": _("Trending")}
+
+    def _get_listing_domain(self, category_ids, search):
+        domain = [("is_published", "!=", False)]
+        if search:
+            domain = expression.AND([domain, [("search_text", "=", search)]])
+        if category_ids:
+            domain = expression.AND([domain, [("document_category_ids", "child_of", category_ids)]])
+        return domain
+
+    def _get_next_offset(self, search, offset, limit, count):
+        """Return the offset of the next page of a search, which has no cursors, or ``None``."""
+        return offset + limit if search and offset + limit < count else None
+
+    def _search_documents(self, category_ids, search, sort, cursor, offset, limit):
+        """Return the ids of a page of the listing with its cursors, safe to share between requests."""
+        Document = request.env["documents.document"].sudo()
+        # the full-text search matches ``search`` itself, it must not be in the domain twice
+        domain = self._get_listing_domain(category_ids, "")
+        previous_cursor = next_cursor = None
+        if search:
+            documents = Document._search_fulltext(search, domain, offset=offset, limit=limit)
+        else:
+            # Numbered pages stay available for crawlers; visitors move on with
+            # cursors, which seek on the index instead of skipping rows.
+            documents, previous_cursor, next_cursor = Document._search_listing(
+                domain, sort=sort, cursor=cursor, offset=offset, limit=limit
+            )
+        return {"document_ids": documents.ids, "previous_cursor": previous_cursor, "next_cursor": next_cursor}
+
+    def _get_category_data(self):
+        Category = request.env["category.category"].sudo()
+        return {
+            "category_ids": Category.search([]).ids,
+            "parent_category_ids": Category.search([("parent_id", "=", False)]).ids,
+            "all_categories": Category.search_read([], ["id", "name"], order="name"),
+        }
+
+    def _render_fragment(self, template, values):
+        View = request.env["ir.ui.view"]
+        return View._render_template(template, dict(View._prepare_qcontext(), **values))
 
     @http.route(["/document/<int:document_id>"], type="http", auth="public", website=True, sitemap=True)
     def document_detail(self, document_id, **kwargs):
@@ -86,38 +209,182 @@ class DocumentController(http.Controller):
         if not document.is_published:
             return request.not_found()
 
-        document.write({"document_click_count": document.document_click_count + 1})
+        # views are counted by the page itself (see document_hit), which also
+        # works when the page is served from a browser or CDN cache
+        validators = None
+        if request.env.user._is_public():
+            validators = self._get_cache_validators(*document._get_detail_validators())
+            if self._is_not_modified(*validators):
+                return self._make_not_modified_response(*validators)
 
         values = self._get_document_page_values(document, **kwargs)
-        return request.render("carbongold_document_management.detail_document_page", values)
+        response = request.render("carbongold_document_management.detail_document_page", values)
+        return self._set_cache_headers(response, validators)
+
+    @http.route(["/document/hit/<int:document_id>"], type="http", auth="public", methods=["POST"], csrf=False)
+    def document_hit(self, document_id, **kwargs):
+        document = request.env["documents.document"].sudo().browse(document_id)
+        if document.exists() and document.is_published:
+            document._record_hits("click")
+        return request.make_response("", headers=[("Cache-Control", "no-store")], status=204)
+
+    def _get_cache_validators(self, last_modified, fingerprint):
+        """Return the ETag and Last-Modified date of a public page.
+
+        :param last_modified: newest ``write_date`` of the records shown on the page
+        :param fingerprint: values changing with the page content, such as
+            record counts, that the date alone would miss
+        """
+        if last_modified:
+            last_modified = last_modified.replace(microsecond=0, tzinfo=timezone.utc)
+        etag = hashlib.sha1(
+            repr((request.website.id, request.lang.code, last_modified, fingerprint)).encode(),
+            usedforsecurity=False,
+        ).hexdigest()
+        return etag, last_modified
+
+    def _is_not_modified(self, etag, last_modified):
+        httprequest = request.httprequest
+        if httprequest.if_none_match:
+            return httprequest.if_none_match.contains(etag)
+        return bool(last_modified and httprequest.if_modified_since and httprequest.if_modified_since >= last_modified)
+
+    def _make_not_modified_response(self, etag, last_modified):
+        return self._set_cache_headers(request.make_response("", status=304), (etag, last_modified))
+
+    def _set_cache_headers(self, response, validators):
+        """Let shared caches keep public pages, and keep personalized pages private.
+
+        :param validators: ETag and Last-Modified date of a public page, or
+            ``None`` for pages rendered for a logged in user
+
+        Shared caches key the pages on the session cookie too, and a public
+        page sending a cookie is made private on its way out (see
+        ``ir.http._post_dispatch``).
+        """
+        response.headers["Vary"] = "Cookie"
+        if validators is None or not request.env.user._is_public():
+            response.headers["Cache-Control"] = "private, no-cache"
+            return response
+        etag, last_modified = validators
+        max_age = int(
+            request.env["ir.config_parameter"]
+            .sudo()
+            .get_param("carbongold_document_management.cdn_max_age", DEFAULT_CDN_MAX_AGE)
+        )
+        response.headers["ETag"] = f'"{etag}"'
+        if last_modified:
+            response.headers["Last-Modified"] = http_date(last_modified)
+        # browsers revalidate every time, shared caches keep the page for max_age
+        response.headers["Cache-Control"] = f"public, max-age=0, s-maxage={max_age}"
+        return response
 
     @http.route(["/document/download/<int:document>"], type="http", auth="public", website=True)
     def document_download(self, document, **kwargs):
-        document_id = request.env["documents.document"].sudo().browse(document)
-        datas = document_id.attachment_id.datas
-        extension = document_id.attachment_id.mimetype.replace('application/', '').replace(';base64', '')
-        filename = f'{document_id.name}.{extension}'
-        mimetype = document_id.attachment_id.mimetype or "application/octet-stream"
-
-        if not document_id.attachment_id.datas:
+        # check the id before reading any field: unknown ids are a 404, not a MissingError
+        document_id = request.env["documents.document"].sudo().browse(document).exists()
+        if not document_id or not document_id.has_content:
             return request.not_found()
 
+        attachment = document_id.attachment_id
+        filename = document_id._get_download_filename()
+        mimetype = document_id.mimetype or "application/octet-stream"
+
+        # Stream the file straight from the filestore: werkzeug serves it in chunks,
+        # answers Range requests with 206 and If-None-Match (checksum ETag) with 304.
+        # When the server runs with --x-sendfile, the reverse proxy serves the bytes.
         try:
-            content = base64.b64decode(datas)
+            stream = request.env["ir.binary"]._get_stream_from(attachment, "raw", filename=filename, mimetype=mimetype)
+            response = stream.get_response(as_attachment=True)
         except Exception as error:
             raise UserError("Error downloading the document: %s" % error) from error
 
-        document_id.write({"document_download_count": document_id.document_download_count + 1})
+        if self._is_download_start(response):
+            document_id._record_hits("download")
+
+        return response
 
+    @http.route(["/documents/bundle"], type="http", auth="public", website=True, sitemap=False)
+    def documents_bundle(self, document_ids=None, category_ids=None, search="", **kwargs):
+        """Download the selected documents, or those of the listing filters, as one ZIP archive.
+
+        The archive is streamed as it is built from the filestore, without
+        Content-Length: members are read by blocks and the already
+        compressed formats are stored as they are.
+        """
+        args = request.httprequest.args
+        try:
+            category_ids = [int(category_id) for category_id in args.getlist("category_ids")]
+            document_ids = [int(document_id) for document_id in (document_ids or "").split(",") if document_id]
+        except ValueError:
+            raise BadRequest(_("The documents and categories of a bundle are given by id.")) from None
+        domain = expression.AND([
+            self._get_listing_domain(category_ids, search),
+            [("type", "=", "binary"), ("attachment_id", "!=", False)],
+        ])
+        if document_ids:
+            domain = expression.AND([domain, [("id", "in", document_ids)]])
+
+        ICP = request.env["ir.config_parameter"].sudo()
+        max_files = int(ICP.get_param("carbongold_document_management.bundle_max_files", DEFAULT_BUNDLE_MAX_FILES))
+        max_size = int(ICP.get_param("carbongold_document_management.bundle_max_size", DEFAULT_BUNDLE_MAX_SIZE))
+        documents = request.env["documents.document"].sudo().search(domain, order="name, id", limit=max_files + 1)
+        if not documents:
+            return request.not_found()
+        if len(documents) > max_files:
+            raise UserError(_("Bundles hold %s documents at most, narrow down the selection.", max_files))
+        if sum(documents.attachment_id.mapped("file_size")) > max_size * 1024 * 1024:
+            raise UserError(_("Bundles hold %s MB at most, narrow down the selection.", max_size))
+
+        entries = documents._get_bundle_entries()
+        documents._record_hits("download")
+        categories = request.env["category.category"].sudo().browse(category_ids).exists()
+        filename = f"{categories.name if len(categories) == 1 else _('documents')}.zip"
         return request.make_response(
-            content,
+            iter_zip(entries),
             headers=[
-                ("Content-Type", mimetype),
-                ("Cache-Control", "no-store"),
+                ("Content-Type", "application/zip"),
                 ("Content-Disposition", content_disposition(filename)),
+                ("Cache-Control", "private, no-store"),
+                # let the reverse proxy pass the chunks on as they are built
+                ("X-Accel-Buffering", "no"),
             ],
         )
 
+    def _is_download_start(self, response):
+        """Tell whether ``response`` starts a new download of the file.
+
+        Revalidations (304) and the follow-up chunks of a resumed or partial
+        download must not be counted, only full responses and ranges that
+        begin at the first byte.
+        """
+        if response.status_code == 200:
+            return True
+        if response.status_code == 206:
+            ranges = request.httprequest.range
+            return bool(ranges and ranges.ranges and ranges.ranges[0][0] == 0)
+        return False
+
+    @http.route(
+        ["/document/thumbnail/<int:document_id>/<string:variant>/<string:unique>"],
+        type="http",
+        auth="public",
+        website=True,
+        sitemap=False,
+    )
+    def document_thumbnail(self, document_id, variant, unique, **kwargs):
+        document = request.env["documents.document"].sudo().browse(document_id)
+        if (
+            variant not in THUMBNAIL_VARIANTS
+            or not document.exists()
+            or not document.is_published
+            or document.portal_thumbnail_state != "done"
+        ):
+            return request.not_found()
+        stream = request.env["ir.binary"]._get_stream_from(document, f"portal_thumbnail_{variant}")
+        # the URL changes with the thumbnail content, so it can be cached forever
+        return stream.get_response(immutable=unique == document.portal_thumbnail_unique)
+
     @http.route(["/document/save_document"], type="http", auth="user", methods=["POST"], website=True, csrf=False)
     def save_document(self, **post):
         name = post.get("name")
@@ -136,18 +403,29 @@ class DocumentController(http.Controller):
             vals["url"] = post.get("document_link")
             vals["type"] = "url"
         else:
+            upload_id = post.get("upload_id")
             upload_file = request.httprequest.files.get("document_file")
-            if upload_file:
+            if upload_id:
+                try:
+                    session = request.env["document.upload.session"]._get_session(upload_id)
+                    attachment = session._create_attachment(name)
+                except UserError:
+                    return request.make_json_response(data=False)
+                vals["attachment_id"] = attachment.id
+                vals["type"] = "binary"
+            elif upload_file:
                 try:
                     file_content = upload_file.read()
                     max_upload_size = document.get_document_max_upload_limit()
                     filename = upload_file.filename or ""
                     if max_upload_size and len(file_content) > max_upload_size:
-                        return request.make_json_response(False)
+                        return request.make_json_response(data=False)
 
                     file_ext = "." + filename.split(".")[-1].lower() if "." in filename else ""
                     if file_ext not in ALLOWED_EXTENSIONS:
-                        return request.make_json_response(False)
+                        return request.make_json_response(data=False)
+                    if not request.env["document.upload.quota"].sudo()._consume(len(file_content), request.env.user):
+                        return request.make_json_response(data=False)
 
                     attachment = (
                         request.env["ir.attachment"]
@@ -165,11 +443,10 @@ class DocumentController(http.Controller):
                 except Exception as error:
                     raise UserError("Error saving the document: %s" % error) from error
             else:
-                return request.make_json_response(False)
+                return request.make_json_response(data=False)
 
+        # the title and image of links are fetched in the background (see _cron_fetch_url_previews)
         document_id = document.sudo().create(vals)
-        if document_id and attachment_type == "link":
-            document_id._compute_name_and_preview()
 
         upload_thumbnail = request.httprequest.files.get("thumbnail")
         if upload_thumbnail and document_id:
@@ -188,6 +465,57 @@ class DocumentController(http.Controller):
 
         return request.make_json_response(bool(document_id))
 
+    @http.route(["/document/upload/start"], type="json", auth="user", methods=["POST"])
+    def upload_start(self, filename, size, mimetype=None):
+        """Open a chunked upload; the parts are then sent to ``/document/upload/chunk``."""
+        file_ext = "." + filename.split(".")[-1].lower() if "." in filename else ""
+        if file_ext not in ALLOWED_EXTENSIONS:
+            return {"error": _("This file type is not allowed.")}
+        max_upload_size = request.env["documents.document"].get_document_max_upload_limit()
+        if max_upload_size and int(size) > max_upload_size:
+            return {"error": _("The file is too large.")}
+        # the announced size is counted as soon as the upload starts, whether or not it completes
+        if not request.env["document.upload.quota"].sudo()._consume(int(size), request.env.user):
+            return {"error": _("You have reached your upload quota, please try again later.")}
+
+        session = (
+            request.env["document.upload.session"]
+            .sudo()
+            .create({
+                "user_id": request.env.user.id,
+                "filename": filename,
+                "mimetype": mimetype or "application/octet-stream",
+                "total_size": int(size),
+            })
+        )
+        return {"upload_id": session.token, "received": 0, "chunk_size": UPLOAD_CHUNK_SIZE}
+
+    @http.route(["/document/upload/status"], type="json", auth="user", methods=["POST"])
+    def upload_status(self, upload_id):
+        """Return how many bytes of the upload were received, to resume it."""
+        try:
+            session = request.env["document.upload.session"]._get_session(upload_id)
+        except UserError as error:
+            return {"error": str(error)}
+        return {
+            "upload_id": session.token,
+            "received": session.received_size,
+            "size": session.total_size,
+            "chunk_size": UPLOAD_CHUNK_SIZE,
+        }
+
+    @http.route(["/document/upload/chunk"], type="http", auth="user", methods=["POST"])
+    def upload_chunk(self, upload_id, offset, checksum=None, **kwargs):
+        chunk = request.httprequest.files.get("chunk")
+        if not chunk:
+            return request.make_json_response({"error": _("No data received.")})
+        try:
+            session = request.env["document.upload.session"]._get_session(upload_id)
+            received = session._append_chunk(int(offset), chunk.stream, checksum)
+        except UserError as error:
+            return request.make_json_response({"error": str(error)})
+        return request.make_json_response({"received": received})
+
     def _get_document_page_values(self, document, **kwargs):
         current_user = request.env.user
 
@@ -195,6 +523,7 @@ class DocumentController(http.Controller):
             "document": document,
             "rating_avg": document.rating_avg,
             "rating_count": document.rating_count,
+            "rating_distribution": document._get_rating_distribution(),
         }
 
         public_user_id = request.env.ref("base.public_user").id
@@ -208,10 +537,18 @@ class DocumentController(http.Controller):
         # Check if current authenticated user has already reviewed
         user_has_reviewed = False
         if is_authenticated and not is_document_owner:  # Only check if not owner
-            user_reviews = document.reviews.filtered(
-                lambda r: not r.is_reply and r.partner_id.id == current_user.partner_id.id
+            user_has_reviewed = bool(
+                request.env["document.review"]
+                .sudo()
+                .search_count(
+                    [
+                        ("document_id", "=", document.id),
+                        ("partner_id", "=", current_user.partner_id.id),
+                        ("is_reply", "=", False),
+                    ],
+                    limit=1,
+                )
             )
-            user_has_reviewed = bool(user_reviews)
         reviews_data = self._get_reviews_data(document)
 
         # Component props
@@ -224,52 +561,19 @@ class DocumentController(http.Controller):
             "currentUserId": current_user.id if is_authenticated else False,
             "currentPartnerName": current_user.partner_id.name if is_authenticated else "",
             "csrfToken": request.csrf_token(),
-            "reviews": reviews_data,
+            "reviews": reviews_data["reviews"],
+            "reviewsCursor": reviews_data["next_cursor"],
         }
 
         values["component_values"] = component_values
         return values
 
     def _get_reviews_data(self, document):
-        reviews_data = []
-
-        for review in document.reviews:
-            if not review.is_reply and review.is_published:
-                review_data = {
-                    "id": review.id,
-                    "comment": review.comment,
-                    "rating": review.rating,
-                    "author_name": review.author_name,
-                    "author_avatar": f"/web/image/res.partner/{review.partner_id.id}/avatar_128",
-                    "create_date": review.create_date.strftime("%B %d, %Y at %I:%M %p"),
-                    "attachment_ids": self._get_attachment_data(review.attachment_ids),
-                    "replies": [],
-                }
-
-                published_replies = review.replies.filtered(lambda r: r.is_published)
-
-                for reply in published_replies:
-                    review_data["replies"].append({
-                        "id": reply.id,
-                        "comment": reply.comment,
-                        "author_name": reply.author_name,
-                        "author_avatar": f"/web/image/res.partner/{reply.partner_id.id}/avatar_128",
-                        "create_date": reply.create_date.strftime("%B %d, %Y at %I:%M %p"),
-                        "attachment_ids": self._get_attachment_data(reply.attachment_ids),
-                    })
-
-                reviews_data.append(review_data)
-
-        return reviews_data
-
-    def _get_attachment_data(self, attachments):
-        return [
-            {
-                "id": att.id,
-                "name": att.name,
-                "mimetype": att.mimetype,
-                "file_size": att.file_size,
-                "access_token": att.access_token,
-            }
-            for att in attachments
-        ]
+        return (
+            request.env["documents.document"]
+            .sudo()
+            ._get_portal_cached(
+                ("reviews", document.id),
+                lambda: request.env["document.review"].sudo()._load_review_tree(document.id),
+            )
+        )
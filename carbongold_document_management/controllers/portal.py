@@ -23,14 +23,6 @@ class DocumentReviewController(http.Controller):
             if document.owner_id and document.owner_id.id == current_user.id:
                 return {"error": "Document owner cannot review their own document."}
 
-            existing = request.env["document.review"].search([
-                ("document_id", "=", document_id),
-                ("partner_id", "=", current_user.partner_id.id),
-                ("is_reply", "=", False),
-            ])
-            if existing:
-                return {"error": "You have already reviewed this document."}
-
             # Create review
             review_vals = {
                 "document_id": document_id,
@@ -40,6 +32,7 @@ class DocumentReviewController(http.Controller):
                 "is_reply": False,
             }
 
+            # a second review of the same partner is refused by a unique index
             review = request.env["document.review"].create(review_vals)
 
             # Handle attachments - update their res_model and res_id from pending state
@@ -80,15 +73,6 @@ class DocumentReviewController(http.Controller):
             if orig_review.partner_id.id == current_user.partner_id.id:
                 return {"error": "You cannot reply to your own review."}
 
-            # Check if already replied (use current user's permissions)
-            existing = request.env["document.review"].search([
-                ("partner_id", "=", current_user.partner_id.id),
-                ("reply_to_id", "=", review_id),
-                ("is_reply", "=", True),
-            ])
-            if existing:
-                return {"error": "You have already replied to this review."}
-
             # Create reply (use current user's permissions for creating their own reply)
             reply_vals = {
                 "document_id": orig_review.document_id.id,
@@ -98,52 +82,34 @@ class DocumentReviewController(http.Controller):
                 "reply_to_id": review_id,
             }
 
+            # a second reply of the same partner is refused by a unique index
             reply_rec = request.env["document.review"].create(reply_vals)
             return {"success": True, "reply_id": reply_rec.id}
         except Exception as e:
             return {"error": str(e)}
 
     @http.route("/document/review/list/<int:document_id>", type="json", auth="public")
-    def list_reviews(self, document_id):
-        """Get all reviews for a document - accessible to everyone"""
-        # FIXED: Use sudo() for reading all reviews publicly
+    def list_reviews(self, document_id, cursor=None):
+        """Get a page of reviews for a document - accessible to everyone"""
         document = request.env["documents.document"].sudo().browse(document_id)
         if not document.exists() or not document.is_published:
-            return []
-
-        reviews = request.env["document.review"].search([
-            ("document_id", "=", document_id),
-            ("is_reply", "=", False),
-            ("is_published", "=", True),
-        ])
-        result = []
-
-        for review in reviews:
-            review_data = {
-                "id": review.id,
-                "comment": review.comment,
-                "rating": review.rating,
-                "author_name": review.author_name,
-                "author_avatar": f"/web/image/res.partner/{review.partner_id.id}/avatar_128",
-                "create_date": review.create_date.strftime("%B %d, %Y at %I:%M %p"),
-                "attachment_ids": [{"id": a.id, "name": a.name} for a in review.attachment_ids],
-                "replies": [],
-            }
-
-            # Add all replies
-            for reply in review.replies:
-                if reply.is_published:
-                    review_data["replies"].append({
-                        "id": reply.id,
-                        "comment": reply.comment,
-                        "author_name": reply.author_name,
-                        "author_avatar": f"/web/image/res.partner/{reply.partner_id.id}/avatar_128",
-                        "create_date": reply.create_date.strftime("%B %d, %Y at %I:%M %p"),
-                    })
-
-            result.append(review_data)
-
-        return result
+            return {"reviews": [], "next_cursor": None}
+        return request.env["document.review"].sudo()._load_review_tree(document_id, cursor=cursor)
+
+    @http.route("/document/review/replies/<int:review_id>", type="json", auth="public")
+    def list_replies(self, review_id, cursor=None):
+        """Get the next page of published replies of a review"""
+        review = request.env["document.review"].sudo().browse(review_id)
+        if not review.exists() or not review.is_published or not review.document_id.is_published:
+            return {"replies": [], "next_cursor": None}
+        return request.env["document.review"].sudo()._load_replies(review_id, cursor=cursor)
+
+    @http.route("/document/review/moderate", type="json", auth="user", methods=["POST"])
+    def moderate_reviews(self, domain, operation, batch_size=500):
+        """Publish, unpublish or delete the reviews matching a domain in batches - internal users only"""
+        if not request.env.user._is_internal():
+            raise AccessError(_("Only internal users can moderate reviews."))
+        return request.env["document.review"]._moderate(domain, operation, batch_size=int(batch_size))
 
     @http.route("/review/attachment/add", type="http", auth="user", methods=["POST"], csrf=True)
     def review_attachment_add(self, **kwargs):
@@ -172,7 +138,13 @@ class DocumentReviewController(http.Controller):
 
             mimetype = file_data.content_type or mimetypes.guess_type(filename)[0] or "application/octet-stream"
 
-            # Create attachment in pending state
+            if not request.env["document.upload.quota"].sudo()._consume(len(file_content), request.env.user):
+                return request.make_response(
+                    json.dumps({"error": _("You have reached your upload quota, please try again later.")}),
+                    headers=[("Content-Type", "application/json")],
+                )
+
+            # Create attachment in pending state, deleted by a cron unless a review is submitted with it
             attachment = (
                 request.env["ir.attachment"]
                 .sudo()
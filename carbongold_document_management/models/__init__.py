@@ -1,6 +1,15 @@
 # Part of Odoo. See LICENSE file for full copyright and licensing details.
 
 from . import category_category
+from . import document_analytics
+from . import document_analytics_event
+from . import document_counter_buffer
+from . import document_import
+from . import document_upload_quota
+from . import document_upload_session
+from . import document_url_preview
+from . import ir_attachment
+from . import ir_http
 from . import documents_document
 from . import document_review
 from . import website
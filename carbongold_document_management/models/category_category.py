@@ -7,20 +7,66 @@ from odoo.exceptions import ValidationError
 class DocumentsCategory(models.Model):
     _name = "category.category"
     _description = "Documents Category"
+    _parent_store = True
 
     name = fields.Char()
-    parent_id = fields.Many2one("category.category", string="Parent Category", ondelete="cascade")
+    parent_id = fields.Many2one("category.category", string="Parent Category", ondelete="cascade", index=True)
+    parent_path = fields.Char(index=True, unaccent=False)
     child_ids = fields.One2many("category.category", "parent_id", "Child Categories")
 
     @api.constrains("parent_id")
     def _check_category_recursion(self):
-        for category in self:
-            if not category._check_recursion() or category.parent_id.parent_id:
-                raise ValidationError(_("You cannot create recursive categories."))
+        # cycles are rejected while the parent paths are updated; categories
+        # only nest two levels deep, so no path below them may hold 3 ids
+        if self.search_count([("id", "child_of", self.ids), ("parent_path", "=like", "%/%/%/%")], limit=1):
+            raise ValidationError(_("You cannot create recursive categories."))
+
+    @api.model_create_multi
+    def create(self, vals_list):
+        categories = super().create(vals_list)
+        self.env["documents.document"]._invalidate_portal_cache()
+        return categories
+
+    def write(self, vals):
+        res = super().write(vals)
+        if "name" in vals:
+            self._get_category_documents()._update_search_vector()
+        self.env["documents.document"]._invalidate_portal_cache()
+        return res
+
+    def unlink(self):
+        documents = self._get_category_documents()
+        documents._invalidate_related_documents()
+        res = super().unlink()
+        documents.exists()._update_search_vector()
+        self.env["documents.document"]._invalidate_portal_cache()
+        return res
+
+    def _get_category_documents(self):
+        return (
+            self.env["documents.document"]
+            .sudo()
+            .with_context(active_test=False)
+            .search([("document_category_ids", "in", self.ids)])
+        )
+
+    @api.model
+    def _get_by_path(self, path, cache=None):
+        """Return the category at ``path``, such as ``Parent/Child``, creating the missing ones.
+
+        Categories nest two levels deep, deeper levels are ignored.
+
+        :param dict cache: ids of the categories already found, by ``(parent id, name)``
+        """
+        cache = {} if cache is None else cache
+        category = self.browse()
+        for name in [name.strip() for name in path.split("/") if name.strip()][:2]:
+            key = (category.id, name)
+            if key not in cache:
+                found = self.search([("name", "=", name), ("parent_id", "=", category.id)], limit=1)
+                cache[key] = (found or self.create({"name": name, "parent_id": category.id})).id
+            category = self.browse(cache[key])
+        return category
 
     def _get_all_subcategory_ids(self):
-        category_ids = self.ids
-        for category in self:
-            if category.child_ids:
-                category_ids += category.child_ids._get_all_subcategory_ids()
-        return category_ids
+        return self.search([("id", "child_of", self.ids)]).ids
@@ -0,0 +1,108 @@
+# Part of Odoo. See LICENSE file for full copyright and licensing details.
+
+from odoo import api, fields, models, tools
+from odoo.tools import SQL
+
+
+class DocumentAnalyticsMixin(models.AbstractModel):
+    """Document views and downloads aggregated per period, website and audience.
+
+    Rows are only written by :meth:`_rollup`, one per document, period,
+    website and audience, so that the reports read a few rows per document
+    and day whatever the traffic.
+    """
+
+    _name = "document.analytics.mixin"
+    _description = "Document Analytics Statistics"
+    _log_access = False
+    _order = "date desc, id desc"
+
+    # source rows of the statistics, the raw events of each day by default
+    _rollup_table = "document_analytics_event"
+    _rollup_date_column = "event_date"
+    _rollup_period = "day"
+    _rollup_view_count = "COUNT(*) FILTER (WHERE src.kind = 'click')"
+    _rollup_download_count = "COUNT(*) FILTER (WHERE src.kind = 'download')"
+
+    date = fields.Date(required=True, readonly=True, index=True)
+    document_id = fields.Many2one("documents.document", required=True, readonly=True, index=True, ondelete="cascade")
+    website_id = fields.Many2one("website", readonly=True, ondelete="cascade")
+    is_authenticated = fields.Boolean("Authenticated Visitors", readonly=True)
+    view_count = fields.Integer("Views", readonly=True)
+    download_count = fields.Integer("Downloads", readonly=True)
+
+    def init(self):
+        super().init()
+        if self._abstract:
+            return
+        tools.create_unique_index(
+            self.env.cr,
+            f"{self._table}_period_unique",
+            self._table,
+            ["date", "document_id", "COALESCE(website_id, 0)", "is_authenticated"],
+        )
+
+    @api.model
+    def _get_rollup_source(self, start):
+        """Return the query aggregating the statistics of the periods since ``start``, or all of them.
+
+        The source rows are those of :attr:`_rollup_table`, dated by
+        :attr:`_rollup_date_column` and counted by :attr:`_rollup_view_count`
+        and :attr:`_rollup_download_count`, aggregated per
+        :attr:`_rollup_period`. Rows of deleted documents are skipped, those
+        of deleted websites count without one.
+        """
+        date_column = SQL.identifier("src", self._rollup_date_column)
+        return SQL(
+            """
+            SELECT date_trunc(%(period)s, %(date_column)s)::date, src.document_id, website.id, src.is_authenticated,
+                   %(view_count)s, %(download_count)s
+              FROM %(table)s src
+              JOIN documents_document doc ON doc.id = src.document_id
+         LEFT JOIN website ON website.id = src.website_id
+             WHERE %(where)s
+          GROUP BY 1, 2, 3, 4
+            """,
+            period=self._rollup_period,
+            date_column=date_column,
+            view_count=SQL(self._rollup_view_count),
+            download_count=SQL(self._rollup_download_count),
+            table=SQL.identifier(self._rollup_table),
+            where=SQL("%s >= %s", date_column, start) if start else SQL("TRUE"),
+        )
+
+    @api.model
+    def _rollup(self, start=None):
+        """Replace the statistics of the periods since ``start`` by their aggregate of the source rows."""
+        self.env.cr.execute(
+            SQL(
+                """
+            INSERT INTO %(table)s (date, document_id, website_id, is_authenticated, view_count, download_count)
+            %(source)s
+            ON CONFLICT (date, document_id, COALESCE(website_id, 0), is_authenticated)
+            DO UPDATE SET view_count = EXCLUDED.view_count, download_count = EXCLUDED.download_count
+            """,
+                table=SQL.identifier(self._table),
+                source=self._get_rollup_source(start),
+            )
+        )
+        self.invalidate_model()
+
+
+class DocumentAnalyticsDaily(models.Model):
+    _name = "document.analytics.daily"
+    _inherit = "document.analytics.mixin"
+    _description = "Document Daily Statistics"
+
+
+class DocumentAnalyticsMonthly(models.Model):
+    _name = "document.analytics.monthly"
+    _inherit = "document.analytics.mixin"
+    _description = "Document Monthly Statistics"
+
+    # months are rolled up from the days, which outlive the raw events
+    _rollup_table = "document_analytics_daily"
+    _rollup_date_column = "date"
+    _rollup_period = "month"
+    _rollup_view_count = "SUM(src.view_count)"
+    _rollup_download_count = "SUM(src.download_count)"
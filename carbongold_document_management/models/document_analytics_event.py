@@ -0,0 +1,175 @@
+# Part of Odoo. See LICENSE file for full copyright and licensing details.
+
+import logging
+from datetime import timedelta
+
+from dateutil.relativedelta import relativedelta
+
+from odoo import api, fields, models, tools
+from odoo.http import request
+
+
+_logger = logging.getLogger(__name__)
+
+# days raw events are kept once rolled up, unless configured otherwise
+DEFAULT_EVENT_RETENTION_DAYS = 90
+
+# months of partitions created ahead of the current one
+PARTITIONS_AHEAD = 2
+
+
+class DocumentAnalyticsEvent(models.Model):
+    """Append-only log of document views and downloads, partitioned by month.
+
+    The table is created by hand as a PostgreSQL partitioned table, so that
+    inserts stay cheap and expired events are pruned by dropping whole
+    partitions. It is never read through the ORM: a cron rolls the events
+    up into ``document.analytics.daily`` and ``document.analytics.monthly``,
+    which the reports are built on.
+    """
+
+    _name = "document.analytics.event"
+    _description = "Document Analytics Event"
+    _auto = False
+    _log_access = False
+
+    event_date = fields.Date(readonly=True)
+    document_id = fields.Many2one("documents.document", readonly=True)
+    website_id = fields.Many2one("website", readonly=True)
+    is_authenticated = fields.Boolean(readonly=True)
+    partner_id = fields.Many2one("res.partner", readonly=True)
+    kind = fields.Selection([("click", "View"), ("download", "Download")], readonly=True)
+
+    def init(self):
+        cr = self.env.cr
+        if not tools.table_exists(cr, self._table):
+            cr.execute(
+                """
+                CREATE TABLE document_analytics_event (
+                    event_date date NOT NULL DEFAULT (now() AT TIME ZONE 'UTC')::date,
+                    document_id integer NOT NULL,
+                    website_id integer,
+                    is_authenticated boolean NOT NULL DEFAULT false,
+                    kind varchar NOT NULL
+                ) PARTITION BY RANGE (event_date)
+                """
+            )
+            # events outside of the created partitions, moved out when theirs is created
+            cr.execute("CREATE TABLE document_analytics_event_default PARTITION OF document_analytics_event DEFAULT")
+            # events are appended in date order: a BRIN index is tiny and enough for the rollup
+            cr.execute(
+                "CREATE INDEX document_analytics_event_date_index ON document_analytics_event USING brin (event_date)"
+            )
+        # downloads of the same visitors relate documents (see documents.document._update_related_documents)
+        cr.execute("ALTER TABLE document_analytics_event ADD COLUMN IF NOT EXISTS partner_id integer")
+        for column in ("document_id", "partner_id"):
+            cr.execute(f"""
+                CREATE INDEX IF NOT EXISTS document_analytics_event_download_{column}_index
+                    ON document_analytics_event ({column})
+                 WHERE kind = 'download' AND partner_id IS NOT NULL
+            """)
+        self._ensure_partitions()
+
+    @api.model
+    def _record(self, documents, kind):
+        """Append one ``kind`` event for each of ``documents``, on the current website."""
+        if not documents:
+            return
+        website = self.env["website"].get_current_website(fallback=False) if request else None
+        partner = self.env.user.partner_id if not self.env.user._is_public() else None
+        self.env.cr.execute(
+            """
+            INSERT INTO document_analytics_event (document_id, website_id, is_authenticated, partner_id, kind)
+            SELECT unnest(%s::int[]), %s, %s, %s, %s
+            """,
+            [
+                list(documents.ids),
+                website.id if website else None,
+                bool(partner),
+                partner.id if partner else None,
+                kind,
+            ],
+        )
+
+    @api.model
+    def _get_partition_name(self, month):
+        return f"{self._table}_p{month:%Y%m}"
+
+    @api.model
+    def _ensure_partitions(self):
+        """Create the partitions of the current month and of the next ones."""
+        cr = self.env.cr
+        month = fields.Date.today().replace(day=1)
+        for _i in range(PARTITIONS_AHEAD + 1):
+            name = self._get_partition_name(month)
+            next_month = month + relativedelta(months=1)
+            if not tools.table_exists(cr, name):
+                # a partition cannot be created while the default one holds rows of its range
+                cr.execute("CREATE TEMPORARY TABLE document_analytics_event_moved (LIKE document_analytics_event)")
+                cr.execute(
+                    """
+                      WITH moved AS (
+                        DELETE FROM document_analytics_event_default
+                         WHERE event_date >= %(start)s AND event_date < %(end)s
+                     RETURNING *
+                      )
+                    INSERT INTO document_analytics_event_moved SELECT * FROM moved
+                    """,
+                    {"start": month, "end": next_month},
+                )
+                cr.execute(
+                    f"""
+                    CREATE TABLE "{name}" PARTITION OF document_analytics_event
+                       FOR VALUES FROM (%s) TO (%s)
+                    """,
+                    [month, next_month],
+                )
+                cr.execute("INSERT INTO document_analytics_event SELECT * FROM document_analytics_event_moved")
+                cr.execute("DROP TABLE document_analytics_event_moved")
+            month = next_month
+
+    @api.model
+    def _prune(self, before):
+        """Delete the events older than ``before``, dropping the partitions they fill entirely."""
+        cr = self.env.cr
+        cr.execute(
+            """
+            SELECT child.relname
+              FROM pg_inherits
+              JOIN pg_class parent ON parent.oid = pg_inherits.inhparent
+              JOIN pg_class child ON child.oid = pg_inherits.inhrelid
+             WHERE parent.relname = %s AND child.relname LIKE %s
+            """,
+            [self._table, f"{self._table}_p%"],
+        )
+        for (name,) in cr.fetchall():
+            month = fields.Date.to_date(f"{name[-6:-2]}-{name[-2:]}-01")
+            if month + relativedelta(months=1) <= before:
+                cr.execute(f'DROP TABLE "{name}"')
+        cr.execute("DELETE FROM document_analytics_event WHERE event_date < %s", [before])
+
+    @api.model
+    def _cron_rollup(self):
+        """Roll the events up into the daily and monthly statistics, then prune the expired ones.
+
+        The days since the last day rolled up are aggregated again as a
+        whole, the day before included for the events committed late, so
+        each run replaces the statistics it covers and may safely be repeated.
+        """
+        ICP = self.env["ir.config_parameter"].sudo()
+        today = fields.Date.today()
+        # the daily statistics are their own watermark: no parameter to write, which would clear the registry cache
+        self.env.cr.execute("SELECT MAX(date) FROM document_analytics_daily")
+        last_rollup = self.env.cr.fetchone()[0]
+        start = last_rollup - timedelta(days=1) if last_rollup else None
+
+        self._ensure_partitions()
+        self.env["document.analytics.daily"]._rollup(start)
+        self.env["document.analytics.monthly"]._rollup(start and start.replace(day=1))
+
+        retention = int(
+            ICP.get_param("carbongold_document_management.analytics_retention_days", DEFAULT_EVENT_RETENTION_DAYS)
+        )
+        # never prune the events the next run aggregates again
+        self._prune(today - timedelta(days=max(retention, 2)))
+        _logger.info("Rolled up the document analytics events since %s", start or "the beginning")
@@ -0,0 +1,100 @@
+# Part of Odoo. See LICENSE file for full copyright and licensing details.
+
+import logging
+
+from odoo import api, fields, models
+
+
+_logger = logging.getLogger(__name__)
+
+
+class DocumentCounterBuffer(models.Model):
+    """Append-only log of document clicks and downloads.
+
+    Hits are inserted here instead of incrementing the counters on
+    ``documents_document`` so that concurrent visitors never lock the
+    document row. A cron folds the buffer into the stored counters.
+    """
+
+    _name = "document.counter.buffer"
+    _description = "Document Counter Buffer"
+    _log_access = False
+
+    document_id = fields.Many2one("documents.document", required=True, ondelete="cascade")
+    kind = fields.Selection([("click", "Click"), ("download", "Download")], required=True)
+
+    @api.model
+    def _record(self, documents, kind):
+        """Append one ``kind`` hit for each of ``documents``."""
+        if not documents:
+            return
+        self.env.cr.execute(
+            "INSERT INTO document_counter_buffer (document_id, kind) SELECT unnest(%s::int[]), %s",
+            [list(documents.ids), kind],
+        )
+
+    @api.model
+    def _flush(self, batch_size=10000, auto_commit=False):
+        """Fold buffered hits into the document counters, ``batch_size`` rows at a time.
+
+        The counters are updated in SQL so that ``write_date`` is left untouched.
+        Rows locked by a concurrent flush are skipped.
+
+        :return: the number of buffered hits that were folded
+        """
+        cr = self.env.cr
+        folded = 0
+        while True:
+            cr.execute(
+                """
+                WITH batch AS (
+                    DELETE FROM document_counter_buffer
+                     WHERE id IN (
+                        SELECT id FROM document_counter_buffer
+                         ORDER BY id
+                         LIMIT %s
+                           FOR UPDATE SKIP LOCKED
+                     )
+                 RETURNING document_id, kind
+                )
+                SELECT document_id,
+                       count(*) FILTER (WHERE kind = 'click'),
+                       count(*) FILTER (WHERE kind = 'download')
+                  FROM batch
+              GROUP BY document_id
+              ORDER BY document_id
+                """,
+                [batch_size],
+            )
+            rows = cr.fetchall()
+            if not rows:
+                break
+            document_ids, clicks, downloads = (list(column) for column in zip(*rows, strict=True))
+            cr.execute(
+                """
+                UPDATE documents_document doc
+                   SET document_click_count = COALESCE(doc.document_click_count, 0) + hits.clicks,
+                       document_download_count = COALESCE(doc.document_download_count, 0) + hits.downloads,
+                       popularity_dirty = TRUE
+                  FROM (
+                    SELECT unnest(%s::int[]) AS id, unnest(%s::int[]) AS clicks, unnest(%s::int[]) AS downloads
+                  ) hits
+                 WHERE doc.id = hits.id
+                """,
+                [document_ids, clicks, downloads],
+            )
+            self.env["documents.document"].browse(document_ids).invalidate_recordset([
+                "document_click_count",
+                "document_download_count",
+                "popularity_dirty",
+            ])
+            folded += sum(clicks) + sum(downloads)
+            if auto_commit:
+                cr.commit()
+        return folded
+
+    @api.model
+    def _cron_flush(self):
+        folded = self._flush(auto_commit=True)
+        if folded:
+            _logger.info("Folded %s buffered document hits into the counters", folded)
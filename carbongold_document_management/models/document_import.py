@@ -0,0 +1,329 @@
+# Part of Odoo. See LICENSE file for full copyright and licensing details.
+
+import contextlib
+import csv
+import io
+import json
+import logging
+import mimetypes
+import os
+import shutil
+import tempfile
+import time
+import zipfile
+
+import psycopg2.errors
+
+from odoo import _, api, fields, models
+from odoo.exceptions import UserError
+from odoo.tools import config
+
+from .document_upload_session import ALLOWED_EXTENSIONS, COPY_BLOCK_SIZE
+
+
+_logger = logging.getLogger(__name__)
+
+# names of the optional manifest at the root of the imported tree, by format
+MANIFEST_NAMES = ("manifest.csv", "manifest.json")
+
+# seconds a cron run imports for before handing over to the next run
+CRON_TIME_LIMIT = 600
+
+
+class DocumentImport(models.Model):
+    """Bulk import of portal documents from a server directory or a ZIP archive.
+
+    Files are listed in path order and imported by batches: their content is
+    streamed into the filestore, then the attachments and documents of the
+    batch are created with one ``create`` call each. The last path imported
+    is saved with every batch, so an interrupted import resumes after it,
+    even if files were added to or removed from the source meanwhile.
+
+    Folders map to categories, ``Parent/Child``. An optional manifest at the
+    root, ``manifest.csv`` or ``manifest.json``, gives the ``name``,
+    ``author``, ``description`` and ``categories`` (category paths separated
+    by ``;``) of the files, by ``path`` relative to the root.
+    """
+
+    _name = "document.import"
+    _description = "Document Import"
+    _order = "id desc"
+
+    name = fields.Char(required=True)
+    source_type = fields.Selection(
+        [("directory", "Server Directory"), ("zip", "ZIP Archive")], required=True, default="zip"
+    )
+    source_path = fields.Char(
+        "Server Path", help="Directory or ZIP archive on the server. Leave empty to import the uploaded archive."
+    )
+    archive = fields.Binary("ZIP Archive", attachment=True)
+    archive_filename = fields.Char()
+    folder_id = fields.Many2one(
+        "documents.folder",
+        string="Workspace",
+        required=True,
+        default=lambda self: self.env.ref(
+            "carbongold_document_management.documents_upload_folder", raise_if_not_found=False
+        ),
+    )
+    publish = fields.Boolean("Publish Documents", help="Publish the imported documents on the website.")
+    batch_size = fields.Integer(default=200, required=True)
+    state = fields.Selection(
+        [("draft", "Draft"), ("queued", "Queued"), ("done", "Done"), ("failed", "Failed")],
+        default="draft",
+        required=True,
+        readonly=True,
+        copy=False,
+    )
+    total_count = fields.Integer("Files", readonly=True, copy=False)
+    processed_count = fields.Integer("Processed Files", readonly=True, copy=False)
+    last_path = fields.Char(
+        "Last Imported Path",
+        readonly=True,
+        copy=False,
+        help="Path of the last file handled, the checkpoint of the import.",
+    )
+    imported_count = fields.Integer("Imported Documents", readonly=True, copy=False)
+    skipped_count = fields.Integer("Skipped Files", readonly=True, copy=False)
+    progress = fields.Float(compute="_compute_progress")
+    log = fields.Text(readonly=True, copy=False)
+
+    @api.depends("total_count", "processed_count")
+    def _compute_progress(self):
+        for record in self:
+            record.progress = 100 * record.processed_count / record.total_count if record.total_count else 0
+
+    def action_start(self):
+        for record in self:
+            if not record.source_path and not record.archive:
+                raise UserError(_("Set the server path or upload the archive to import."))
+            if record.source_path and not os.path.exists(record.source_path):
+                raise UserError(_("The path %s does not exist on the server.", record.source_path))
+        self.write({"state": "queued"})
+        self.env.ref("carbongold_document_management.ir_cron_process_document_imports")._trigger()
+
+    def action_reset(self):
+        self.write({
+            "state": "draft",
+            "total_count": 0,
+            "processed_count": 0,
+            "last_path": False,
+            "imported_count": 0,
+            "skipped_count": 0,
+            "log": False,
+        })
+
+    @api.model
+    def _cron_process_imports(self):
+        deadline = time.monotonic() + CRON_TIME_LIMIT
+        for record in self.search([("state", "=", "queued")], order="id"):
+            if not record._process(deadline=deadline, auto_commit=True):
+                # out of time: the next run resumes from the checkpoint
+                self.env.ref("carbongold_document_management.ir_cron_process_document_imports")._trigger()
+                return
+
+    def _process(self, deadline=None, auto_commit=False):
+        """Import the files of ``self`` from the checkpoint on, batch by batch.
+
+        :param deadline: ``time.monotonic()`` value after which no new batch is started
+        :param auto_commit: commit each batch with its checkpoint
+        :return: whether the import is over
+        """
+        self.ensure_one()
+        try:
+            self._lock()
+            with self._open_source() as source:
+                entries = source.list()
+                manifest = source.read_manifest()
+                if self.last_path:
+                    entries = [path for path in entries if path > self.last_path]
+                self.total_count = self.processed_count + len(entries)
+                categories = {}
+                for index in range(0, len(entries), self.batch_size):
+                    if deadline and time.monotonic() > deadline:
+                        return False
+                    batch = entries[index : index + self.batch_size]
+                    self._import_batch(source, batch, manifest, categories)
+                    self.processed_count += len(batch)
+                    self.last_path = batch[-1]
+                    if auto_commit:
+                        self.env.cr.commit()
+                        self._lock()
+        except psycopg2.errors.LockNotAvailable:
+            if not auto_commit:
+                raise
+            # another worker runs the import: it is left as it is
+            self.env.cr.rollback()
+            _logger.info("Document import %s is being processed by another worker", self.id)
+            return True
+        except Exception as error:
+            if not auto_commit:
+                raise
+            self.env.cr.rollback()
+            _logger.exception("Document import %s failed", self.id)
+            self.write({"state": "failed", "log": self._append_log(str(error))})
+            self.env.cr.commit()
+            return True
+        self.state = "done"
+        return True
+
+    def _lock(self):
+        """Lock ``self`` until the end of the transaction, failing if another worker runs it."""
+        self.env.cr.execute("SELECT id FROM document_import WHERE id = %s FOR UPDATE NOWAIT", [self.id])
+
+    def _append_log(self, message):
+        return f"{self.log}\n{message}" if self.log else message
+
+    def _import_batch(self, source, paths, manifest, categories):
+        """Import the files at ``paths`` of ``source``; the others are counted as skipped."""
+        Category = self.env["category.category"].sudo()
+        attachment_vals, document_vals, tmp_paths, skipped = [], [], [], []
+        for path in paths:
+            extension = os.path.splitext(path)[1].lower()
+            if extension not in ALLOWED_EXTENSIONS:
+                skipped.append(path)
+                continue
+            info = manifest.get(path, {})
+            category_paths = info.get("categories")
+            if category_paths is None:
+                category_paths = [os.path.dirname(path)] if os.path.dirname(path) else []
+            elif isinstance(category_paths, str):
+                category_paths = [category for category in category_paths.split(";") if category.strip()]
+            category_ids = [Category._get_by_path(category, categories).id for category in category_paths]
+
+            tmp_paths.append(source.extract(path))
+            filename = os.path.basename(path)
+            name = info.get("name") or os.path.splitext(filename)[0]
+            attachment_vals.append({
+                "name": filename,
+                "mimetype": mimetypes.guess_type(filename)[0] or "application/octet-stream",
+                "res_model": "documents.document",
+            })
+            document_vals.append({
+                "name": name,
+                "author": info.get("author") or False,
+                "doc_description": info.get("description") or False,
+                "document_category_ids": [(6, 0, [category_id for category_id in category_ids if category_id])],
+                "folder_id": self.folder_id.id,
+                "owner_id": self.create_uid.id,
+                "type": "binary",
+                "is_published": self.publish,
+            })
+        if document_vals:
+            attachments = self.env["ir.attachment"].sudo()._create_from_paths(attachment_vals, tmp_paths)
+            for vals, attachment in zip(document_vals, attachments, strict=True):
+                vals["attachment_id"] = attachment.id
+            self.env["documents.document"].sudo().create(document_vals)
+        self.imported_count += len(document_vals)
+        self.skipped_count += len(skipped)
+        if skipped:
+            self.log = self._append_log(_("Skipped files of unsupported types: %s", ", ".join(skipped)))
+
+    def _open_source(self):
+        self.ensure_one()
+        tmp_root = self._get_tmp_root()
+        if self.source_type == "directory":
+            return DirectorySource(self.source_path, tmp_root)
+        if self.source_path:
+            return ZipSource(self.source_path, tmp_root)
+        attachment = (
+            self.env["ir.attachment"]
+            .sudo()
+            .search([("res_model", "=", self._name), ("res_id", "=", self.id), ("res_field", "=", "archive")], limit=1)
+        )
+        if attachment.store_fname:
+            return ZipSource(attachment._full_path(attachment.store_fname), tmp_root)
+        return ZipSource(io.BytesIO(attachment.raw), tmp_root)
+
+    @api.model
+    def _get_tmp_root(self):
+        # on the filestore's volume, so that the extracted files are moved rather than copied
+        path = os.path.join(config["data_dir"], "carbongold_imports", self.env.cr.dbname)
+        os.makedirs(path, exist_ok=True)
+        return path
+
+
+class ImportSource:
+    """Files of an import, by path relative to the root of the imported tree, with ``/`` separators."""
+
+    def __init__(self, tmp_root=None):
+        self.tmp_root = tmp_root
+        self.tmp_dir = None
+
+    def __enter__(self):
+        self.tmp_dir = tempfile.mkdtemp(prefix="document_import_", dir=self.tmp_root)
+        return self
+
+    def __exit__(self, *exc_info):
+        shutil.rmtree(self.tmp_dir, ignore_errors=True)
+
+    def list(self):
+        """Return the sorted paths of the files to import, the manifest and hidden files left out."""
+        return sorted(
+            path
+            for path in self._list()
+            if path not in MANIFEST_NAMES and not any(part.startswith((".", "__MACOSX")) for part in path.split("/"))
+        )
+
+    def _list(self):
+        raise NotImplementedError
+
+    def open(self, path):
+        raise NotImplementedError
+
+    def extract(self, path):
+        """Copy the file at ``path`` to a temporary file, block by block, and return the copy's path."""
+        fd, tmp_path = tempfile.mkstemp(dir=self.tmp_dir)
+        with os.fdopen(fd, "wb") as tmp_file, self.open(path) as file:
+            shutil.copyfileobj(file, tmp_file, COPY_BLOCK_SIZE)
+        return tmp_path
+
+    def read_manifest(self):
+        """Return the manifest entries by path, empty without manifest."""
+        paths = set(self._list())
+        if "manifest.json" in paths:
+            with self.open("manifest.json") as file:
+                rows = json.load(file)
+        elif "manifest.csv" in paths:
+            with self.open("manifest.csv") as file:
+                rows = list(csv.DictReader(io.TextIOWrapper(file, encoding="utf-8-sig")))
+        else:
+            return {}
+        return {row["path"].strip("/"): row for row in rows if row.get("path")}
+
+
+class DirectorySource(ImportSource):
+    def __init__(self, root, tmp_root=None):
+        super().__init__(tmp_root)
+        self.root = root
+
+    def _list(self):
+        for directory, _dirnames, filenames in os.walk(self.root):
+            for filename in filenames:
+                yield os.path.relpath(os.path.join(directory, filename), self.root).replace(os.sep, "/")
+
+    @contextlib.contextmanager
+    def open(self, path):
+        with open(os.path.join(self.root, *path.split("/")), "rb") as file:
+            yield file
+
+
+class ZipSource(ImportSource):
+    def __init__(self, archive, tmp_root=None):
+        super().__init__(tmp_root)
+        self.archive = archive
+        self.zip_file = None
+
+    def __enter__(self):
+        self.zip_file = zipfile.ZipFile(self.archive)
+        return super().__enter__()
+
+    def __exit__(self, *exc_info):
+        self.zip_file.close()
+        return super().__exit__(*exc_info)
+
+    def _list(self):
+        return [info.filename for info in self.zip_file.infolist() if not info.is_dir()]
+
+    def open(self, path):
+        return self.zip_file.open(path)
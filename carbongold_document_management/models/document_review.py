@@ -1,9 +1,53 @@
 # Part of Odoo. See LICENSE file for full copyright and licensing details.
 
+import logging
+import time
 import uuid
+from contextlib import contextmanager
+from datetime import datetime
 
-from odoo import _, api, fields, models
-from odoo.exceptions import ValidationError
+from psycopg2 import errors
+
+from odoo import _, _lt, api, fields, models, tools
+from odoo.exceptions import UserError, ValidationError
+from odoo.osv import expression
+from odoo.tools import SQL
+
+from odoo.addons.carbongold_document_management.utils import decode_cursor, encode_cursor
+
+
+_logger = logging.getLogger(__name__)
+
+# fields deciding whether and how a review counts in the rating statistics of its document
+RATING_STATS_FIELDS = {"document_id", "rating", "is_published", "is_reply"}
+
+# bulk moderation operations, by name: values written on the reviews, or None to delete them
+MODERATION_OPERATIONS = {
+    "publish": {"is_published": True},
+    "unpublish": {"is_published": False},
+    "delete": None,
+}
+
+# partial unique indexes of the reviews: name -> (columns, filter, message of the violation)
+UNIQUE_REVIEW_INDEXES = {
+    "document_review_partner_review_unique": (
+        ["document_id", "partner_id"],
+        "is_reply IS NOT TRUE",
+        _lt("You have already reviewed this document."),
+    ),
+    "document_review_partner_reply_unique": (
+        ["reply_to_id", "partner_id"],
+        "is_reply AND reply_to_id IS NOT NULL",
+        _lt("You have already replied to this review."),
+    ),
+}
+
+# fields whose change may violate the unique indexes: their columns and filters
+UNIQUE_REVIEW_FIELDS = {"document_id", "partner_id", "reply_to_id", "is_reply"}
+
+# fields of the reviews and replies sent to the portal
+REVIEW_TREE_FIELDS = ["comment", "rating", "partner_id", "create_date", "attachment_ids"]
+REVIEW_ATTACHMENT_FIELDS = ["name", "mimetype", "file_size", "access_token"]
 
 
 class DocumentReview(models.Model):
@@ -44,19 +88,6 @@ class DocumentReview(models.Model):
             if record.rating and (record.rating < 0 or record.rating > 5):
                 raise ValidationError(_("Rating must be between 0 and 5 stars."))
 
-    @api.constrains("reply_to_id", "partner_id")
-    def _check_unique_reply(self):
-        for record in self:
-            if record.is_reply and record.reply_to_id and record.partner_id:
-                count = self.search_count([
-                    ("reply_to_id", "=", record.reply_to_id.id),
-                    ("partner_id", "=", record.partner_id.id),
-                    ("is_reply", "=", True),
-                    ("id", "!=", record.id),
-                ])
-                if count:
-                    raise ValidationError(_("You can only reply once per review."))
-
     @api.model_create_multi
     def create(self, vals_list):
         for vals in vals_list:
@@ -70,4 +101,310 @@ class DocumentReview(models.Model):
                 if parent and parent.partner_id and parent.partner_id.id == vals.get("partner_id"):
                     raise ValidationError(_("You can't reply to your own review."))
 
-        return super().create(vals_list)
+        with self._translate_unique_violations():
+            reviews = super().create(vals_list)
+        self.env["documents.document"].sudo()._update_rating_stats(added=reviews._get_rating_contributions())
+        if any(reviews.mapped("is_published")):
+            self.env["documents.document"]._invalidate_portal_cache()
+        return reviews
+
+    def write(self, vals):
+        # only published reviews show on the public pages, pending ones may change freely
+        affects_portal = "is_published" in vals or any(self.mapped("is_published"))
+        removed = self._get_rating_contributions() if RATING_STATS_FIELDS.intersection(vals) else None
+        if UNIQUE_REVIEW_FIELDS.intersection(vals):
+            with self._translate_unique_violations():
+                res = super().write(vals)
+                # the unique indexes are only checked once the changes are flushed
+                self.flush_recordset()
+        else:
+            res = super().write(vals)
+        if removed is not None:
+            self.env["documents.document"].sudo()._update_rating_stats(
+                removed=removed, added=self._get_rating_contributions()
+            )
+        if affects_portal:
+            self.env["documents.document"]._invalidate_portal_cache()
+        return res
+
+    def unlink(self):
+        removed = self._get_rating_contributions()
+        affects_portal = any(self.mapped("is_published"))
+        res = super().unlink()
+        self.env["documents.document"].sudo()._update_rating_stats(removed=removed)
+        if affects_portal:
+            self.env["documents.document"]._invalidate_portal_cache()
+        return res
+
+    @contextmanager
+    def _translate_unique_violations(self):
+        """Turn the violations of the unique indexes by the block into validation errors.
+
+        A partner reviews a document once and replies to a review once (see
+        :data:`UNIQUE_REVIEW_INDEXES`); the block runs in a savepoint, so the
+        transaction goes on after the error.
+        """
+        try:
+            with self.env.cr.savepoint(flush=False):
+                yield
+        except errors.UniqueViolation as error:
+            if error.diag.constraint_name not in UNIQUE_REVIEW_INDEXES:
+                raise
+            raise ValidationError(str(UNIQUE_REVIEW_INDEXES[error.diag.constraint_name][2])) from None
+
+    def init(self):
+        super().init()
+        cr = self.env.cr
+        for name, (columns, where, _message) in UNIQUE_REVIEW_INDEXES.items():
+            if tools.index_exists(cr, name):
+                continue
+            try:
+                with cr.savepoint(flush=False):
+                    cr.execute(f"CREATE UNIQUE INDEX {name} ON document_review ({', '.join(columns)}) WHERE {where}")
+            except errors.UniqueViolation:
+                _logger.warning("Cannot create the index %s: remove the duplicate reviews and update the module", name)
+        # backfill the rating statistics of documents that have none yet
+        self.env.cr.execute(
+            """
+            WITH stats AS (
+                SELECT document_id,
+                       SUM(rating) AS rating_sum,
+                       COUNT(*) AS rating_count,
+                       COUNT(*) FILTER (WHERE star = 1) AS star_1,
+                       COUNT(*) FILTER (WHERE star = 2) AS star_2,
+                       COUNT(*) FILTER (WHERE star = 3) AS star_3,
+                       COUNT(*) FILTER (WHERE star = 4) AS star_4,
+                       COUNT(*) FILTER (WHERE star = 5) AS star_5
+                  FROM (
+                      SELECT document_id, rating, LEAST(GREATEST(FLOOR(rating + 0.5)::int, 1), 5) AS star
+                        FROM document_review
+                       WHERE is_published AND is_reply IS NOT TRUE AND rating > 0
+                  ) ratings
+              GROUP BY document_id
+            )
+            UPDATE documents_document document
+               SET rating_sum = COALESCE(stats.rating_sum, 0),
+                   rating_count = COALESCE(stats.rating_count, 0),
+                   rating_avg = COALESCE(stats.rating_sum / stats.rating_count, 0),
+                   rating_histogram = jsonb_build_object(
+                       '1', COALESCE(stats.star_1, 0),
+                       '2', COALESCE(stats.star_2, 0),
+                       '3', COALESCE(stats.star_3, 0),
+                       '4', COALESCE(stats.star_4, 0),
+                       '5', COALESCE(stats.star_5, 0)
+                   )
+              FROM documents_document target
+         LEFT JOIN stats ON stats.document_id = target.id
+             WHERE document.id = target.id AND document.rating_histogram IS NULL
+            """
+        )
+
+    def _get_rating_contributions(self):
+        """Return the ``(document_id, rating)`` of the reviews counted in the rating statistics."""
+        return [
+            (review.document_id.id, review.rating)
+            for review in self
+            if review.is_published and not review.is_reply and review.rating > 0
+        ]
+
+    def action_moderate_publish(self):
+        return self._action_moderate("publish")
+
+    def action_moderate_unpublish(self):
+        return self._action_moderate("unpublish")
+
+    def action_moderate_delete(self):
+        return self._action_moderate("delete")
+
+    def _action_moderate(self, operation):
+        result = self._moderate([("id", "in", self.ids)], operation)
+        return {
+            "type": "ir.actions.client",
+            "tag": "display_notification",
+            "params": {
+                "type": "success",
+                "message": _(
+                    "%(count)s reviews processed in %(duration)ss (%(rate)s per second).",
+                    count=result["count"],
+                    duration=result["duration"],
+                    rate=result["rate"],
+                ),
+                "next": {"type": "ir.actions.act_window_close"},
+            },
+        }
+
+    @api.model
+    def _moderate(self, domain, operation, batch_size=500):
+        """Publish, unpublish or delete the reviews and replies matching ``domain``, in batches.
+
+        Each batch is a single write or unlink, so the rating statistics of
+        every affected document are updated once per batch whatever the
+        number of its reviews in the batch. Deleted reviews take their replies
+        with them.
+
+        :param operation: key of :data:`MODERATION_OPERATIONS`
+        :return: dict with the ``count`` of processed reviews, the number of
+            ``batches`` and affected ``documents``, the ``duration`` in seconds
+            and the ``rate`` in reviews per second
+        """
+        if operation not in MODERATION_OPERATIONS:
+            raise UserError(_("Unknown moderation operation: %s", operation))
+        values = MODERATION_OPERATIONS[operation]
+        if values is not None:
+            domain = expression.AND([domain, [("is_published", "!=", values["is_published"])]])
+
+        start = time.monotonic()
+        review_ids = self.search(domain, order="id").ids
+        count, batches, document_ids = 0, 0, set()
+        for index in range(0, len(review_ids), batch_size):
+            batch = self.browse(review_ids[index : index + batch_size]).exists()
+            if values is None:
+                batch |= batch.replies
+            document_ids.update(batch.document_id.ids)
+            if values is None:
+                batch.unlink()
+            else:
+                batch.write(values)
+            self.env.flush_all()
+            self.env.invalidate_all()
+            count += len(batch)
+            batches += 1
+
+        duration = time.monotonic() - start
+        _logger.info("%s %d document reviews in %d batches (%.2fs)", operation, count, batches, duration)
+        return {
+            "count": count,
+            "batches": batches,
+            "documents": len(document_ids),
+            "duration": round(duration, 3),
+            "rate": round(count / duration) if duration else count,
+        }
+
+    @api.model
+    def _load_review_tree(self, document_id, cursor=None, limit=10, reply_limit=3):
+        """Return a page of the published reviews of a document, with their first replies.
+
+        The page is loaded in a fixed number of queries whatever the number of
+        reviews, replies and attachments: one for the page, one for the reply
+        counts, one for the first replies of all the reviews, then batched
+        reads of their fields, authors and attachments.
+
+        :param cursor: cursor of the page, as returned in ``next_cursor``
+        :param reply_limit: number of replies loaded with each review, the
+            others being fetched with :meth:`_load_replies`
+        :return: dict with the ``reviews`` of the page and the ``next_cursor``
+            of the following page, or ``None`` on the last one
+        """
+        domain = [("document_id", "=", document_id), ("is_reply", "=", False), ("is_published", "=", True)]
+        review_ids, next_cursor = self._search_page(domain, cursor, limit)
+
+        reply_counts = {
+            review.id: count
+            for review, count in self._read_group(
+                [("reply_to_id", "in", review_ids), ("is_reply", "=", True), ("is_published", "=", True)],
+                ["reply_to_id"],
+                ["__count"],
+            )
+        }
+        reply_rows = []
+        if review_ids and reply_limit:
+            self.env.cr.execute(
+                SQL(
+                    """
+                SELECT id, reply_to_id, create_date FROM (
+                    SELECT id, reply_to_id, create_date,
+                           row_number() OVER (PARTITION BY reply_to_id ORDER BY create_date DESC, id DESC) AS rank
+                      FROM document_review
+                     WHERE reply_to_id IN %s AND is_reply AND is_published
+                ) replies
+                 WHERE rank <= %s
+              ORDER BY reply_to_id, create_date DESC, id DESC
+                """,
+                    tuple(review_ids),
+                    reply_limit,
+                )
+            )
+            reply_rows = self.env.cr.fetchall()
+
+        records = self._read_review_data(review_ids + [row[0] for row in reply_rows])
+        replies_by_review = {}
+        for reply_id, review_id, create_date in reply_rows:
+            replies_by_review.setdefault(review_id, []).append((records[reply_id], create_date))
+
+        reviews = []
+        for review_id in review_ids:
+            replies = replies_by_review.get(review_id, [])
+            reply_count = reply_counts.get(review_id, 0)
+            replies_cursor = None
+            if replies and reply_count > len(replies):
+                last_reply, last_date = replies[-1]
+                replies_cursor = encode_cursor(last_date, last_reply["id"])
+            reviews.append({
+                **records[review_id],
+                "replies": [reply for reply, _create_date in replies],
+                "reply_count": reply_count,
+                "replies_cursor": replies_cursor,
+            })
+        return {"reviews": reviews, "next_cursor": next_cursor}
+
+    @api.model
+    def _load_replies(self, review_id, cursor=None, limit=20):
+        """Return a page of the published replies of a review, for lazy loading."""
+        domain = [("reply_to_id", "=", review_id), ("is_reply", "=", True), ("is_published", "=", True)]
+        reply_ids, next_cursor = self._search_page(domain, cursor, limit)
+        records = self._read_review_data(reply_ids)
+        return {"replies": [records[reply_id] for reply_id in reply_ids], "next_cursor": next_cursor}
+
+    @api.model
+    def _search_page(self, domain, cursor, limit):
+        """Return the ids of a page of ``domain``, and the cursor of the next page.
+
+        Pages are ordered like reviews and seek on ``(create_date, id)``, so
+        deep pages cost the same as the first one.
+        """
+        query = self._search(domain, limit=limit + 1, order="create_date DESC, id DESC")
+        create_date_column = SQL.identifier(self._table, "create_date")
+        id_column = SQL.identifier(self._table, "id")
+        position = decode_cursor(cursor)
+        if position:
+            try:
+                create_date, record_id = datetime.fromisoformat(position[0]), int(position[1])
+                query.add_where(SQL("(%s, %s) < (%s, %s)", create_date_column, id_column, create_date, record_id))
+            except (IndexError, TypeError, ValueError):
+                pass
+        self.env.cr.execute(query.select(id_column, create_date_column))
+        rows = self.env.cr.fetchall()
+        next_cursor = None
+        if len(rows) > limit:
+            last_id, last_date = rows[limit - 1]
+            next_cursor = encode_cursor(last_date, last_id)
+        return [row[0] for row in rows[:limit]], next_cursor
+
+    @api.model
+    def _read_review_data(self, review_ids):
+        """Return the portal data of the given reviews and replies by id, read in batch."""
+        if not review_ids:
+            return {}
+        reviews = self.browse(review_ids).read(REVIEW_TREE_FIELDS, load=None)
+        partners = {
+            partner["id"]: partner["name"]
+            for partner in self.env["res.partner"].browse({r["partner_id"] for r in reviews}).read(["name"])
+        }
+        attachments = {
+            attachment["id"]: attachment
+            for attachment in self.env["ir.attachment"]
+            .browse({att_id for r in reviews for att_id in r["attachment_ids"]})
+            .read(REVIEW_ATTACHMENT_FIELDS)
+        }
+        return {
+            review["id"]: {
+                "id": review["id"],
+                "comment": review["comment"],
+                "rating": review["rating"],
+                "author_name": partners.get(review["partner_id"], ""),
+                "author_avatar": f"/web/image/res.partner/{review['partner_id']}/avatar_128",
+                "create_date": review["create_date"].strftime("%B %d, %Y at %I:%M %p"),
+                "attachment_ids": [attachments[att_id] for att_id in review["attachment_ids"] if att_id in attachments],
+            }
+            for review in reviews
+        }
@@ -0,0 +1,93 @@
+# Part of Odoo. See LICENSE file for full copyright and licensing details.
+
+from datetime import datetime, timedelta
+
+from odoo import api, fields, models
+
+
+# megabytes a user may upload per rolling window, unless configured otherwise; 0 disables the quota
+DEFAULT_UPLOAD_QUOTA_MB = 500
+
+# hours of the rolling window of the quota, unless configured otherwise
+DEFAULT_UPLOAD_QUOTA_WINDOW_HOURS = 24
+
+# origin the periods of the quota windows are aligned on
+QUOTA_EPOCH = datetime(2000, 1, 1)
+
+
+class DocumentUploadQuota(models.Model):
+    """Bytes uploaded by each user over a rolling window, one row per user.
+
+    The window slides by fixed periods: a row keeps the bytes of the current
+    period and of the previous one, and the usage is the current bytes plus
+    the share of the previous ones still inside the window. The estimate is
+    close to an exact sliding window without keeping a row per upload.
+    """
+
+    _name = "document.upload.quota"
+    _description = "Document Upload Quota"
+    _log_access = False
+    _rec_name = "user_id"
+
+    user_id = fields.Many2one("res.users", required=True, readonly=True, ondelete="cascade")
+    period_start = fields.Datetime(required=True, readonly=True)
+    current_bytes = fields.Float(readonly=True)
+    previous_bytes = fields.Float(readonly=True)
+
+    _sql_constraints = [("user_unique", "UNIQUE(user_id)", "A user has a single upload quota.")]
+
+    @api.model
+    def _get_limits(self):
+        """Return the quota in bytes, 0 when disabled, and the length of its window."""
+        ICP = self.env["ir.config_parameter"].sudo()
+        quota = int(ICP.get_param("carbongold_document_management.upload_quota_mb", DEFAULT_UPLOAD_QUOTA_MB))
+        window = int(
+            ICP.get_param("carbongold_document_management.upload_quota_window_hours", DEFAULT_UPLOAD_QUOTA_WINDOW_HOURS)
+        )
+        return quota * 1024 * 1024, timedelta(hours=window)
+
+    @api.model
+    def _consume(self, size, user=None):
+        """Count an upload of ``size`` bytes against the quota of ``user``, the current one by default.
+
+        The row of the user is locked, so concurrent uploads are counted one
+        after the other. Administrators have no quota.
+
+        :return: whether the upload fits in the quota; it is not counted otherwise
+        """
+        user = user or self.env.user
+        quota, window = self._get_limits()
+        if not quota or user._is_superuser() or user._is_system():
+            return True
+        cr = self.env.cr
+        now = fields.Datetime.now()
+        period_start = QUOTA_EPOCH + window * ((now - QUOTA_EPOCH) // window)
+        cr.execute(
+            """
+            INSERT INTO document_upload_quota (user_id, period_start, current_bytes, previous_bytes)
+            VALUES (%s, %s, 0, 0)
+            ON CONFLICT (user_id) DO NOTHING
+            """,
+            [user.id, period_start],
+        )
+        cr.execute(
+            "SELECT period_start, current_bytes, previous_bytes FROM document_upload_quota WHERE user_id = %s FOR UPDATE",
+            [user.id],
+        )
+        last_start, current_bytes, previous_bytes = cr.fetchone()
+        if last_start != period_start:
+            previous_bytes = current_bytes if last_start == period_start - window else 0
+            current_bytes = 0
+        elapsed = (now - period_start) / window
+        usage = current_bytes + previous_bytes * (1 - elapsed)
+        if usage + size > quota:
+            return False
+        cr.execute(
+            """
+            UPDATE document_upload_quota
+               SET period_start = %s, current_bytes = %s, previous_bytes = %s
+             WHERE user_id = %s
+            """,
+            [period_start, current_bytes + size, previous_bytes, user.id],
+        )
+        return True
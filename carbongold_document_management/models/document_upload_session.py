@@ -0,0 +1,138 @@
+# Part of Odoo. See LICENSE file for full copyright and licensing details.
+
+import hashlib
+import os
+import uuid
+
+from odoo import _, api, fields, models
+from odoo.exceptions import UserError
+from odoo.tools import config
+
+
+# extensions of the files visitors may upload
+ALLOWED_EXTENSIONS = {
+    ".pdf",
+    ".doc",
+    ".docx",
+    ".pptx",
+    ".xls",
+    ".xlsx",
+    ".csv",
+    ".txt",
+    ".jpg",
+    ".jpeg",
+    ".png",
+    ".webp",
+    ".zip",
+}
+
+# size of the blocks copied between streams, so that no upload is ever held whole in memory
+COPY_BLOCK_SIZE = 1024 * 1024
+
+
+class DocumentUploadSession(models.TransientModel):
+    """Chunked, resumable upload of a portal document.
+
+    The parts are appended to a temporary file next to the filestore; the
+    client resumes from ``received_size`` after an interruption. Once
+    complete, the file is moved into the filestore under its SHA-1 and
+    attached to a new ``ir.attachment`` without being loaded in memory.
+    Abandoned sessions are vacuumed with their temporary file.
+    """
+
+    _name = "document.upload.session"
+    _description = "Document Upload Session"
+    _transient_max_hours = 24
+
+    token = fields.Char(required=True, index=True, default=lambda self: uuid.uuid4().hex)
+    user_id = fields.Many2one("res.users", required=True, default=lambda self: self.env.user, ondelete="cascade")
+    filename = fields.Char(required=True)
+    mimetype = fields.Char()
+    total_size = fields.Integer(required=True)
+    received_size = fields.Integer(default=0)
+
+    @api.model
+    def _get_upload_dir(self):
+        # on the filestore's volume, so that complete files are moved rather than copied
+        path = os.path.join(config["data_dir"], "carbongold_uploads", self.env.cr.dbname)
+        os.makedirs(path, exist_ok=True)
+        return path
+
+    def _get_tmp_path(self):
+        self.ensure_one()
+        return os.path.join(self._get_upload_dir(), self.token)
+
+    @api.model
+    def _get_session(self, token):
+        """Return the upload session ``token`` of the current user, locked for update."""
+        session = self.sudo().search([("token", "=", token or ""), ("user_id", "=", self.env.uid)], limit=1)
+        if not session:
+            raise UserError(_("This upload does not exist or has expired."))
+        self.env.cr.execute("SELECT id FROM document_upload_session WHERE id = %s FOR UPDATE", [session.id])
+        return session
+
+    @api.model_create_multi
+    def create(self, vals_list):
+        sessions = super().create(vals_list)
+        for session in sessions:
+            with open(session._get_tmp_path(), "wb"):
+                pass
+        return sessions
+
+    def unlink(self):
+        paths = [session._get_tmp_path() for session in self]
+        res = super().unlink()
+        for path in paths:
+            if os.path.exists(path):
+                os.unlink(path)
+        return res
+
+    def _append_chunk(self, offset, stream, checksum=None):
+        """Append the part read from ``stream`` at byte ``offset`` of the upload.
+
+        :param checksum: optional SHA-256 hex digest of the part; the part is
+            discarded when it does not match
+        :return: the number of bytes received so far
+        """
+        self.ensure_one()
+        if offset != self.received_size:
+            raise UserError(
+                _(
+                    "Unexpected upload offset %(offset)s, expected %(expected)s.",
+                    offset=offset,
+                    expected=self.received_size,
+                )
+            )
+        digest = hashlib.sha256()
+        size = offset
+        with open(self._get_tmp_path(), "r+b") as tmp_file:
+            tmp_file.seek(offset)
+            tmp_file.truncate()
+            while block := stream.read(COPY_BLOCK_SIZE):
+                size += len(block)
+                if size > self.total_size:
+                    tmp_file.truncate(offset)
+                    raise UserError(_("The upload is larger than announced."))
+                digest.update(block)
+                tmp_file.write(block)
+            if checksum and digest.hexdigest() != checksum.lower():
+                tmp_file.truncate(offset)
+                raise UserError(_("The uploaded part is corrupted, please send it again."))
+        self.received_size = size
+        return size
+
+    def _create_attachment(self, name, res_model="documents.document"):
+        """Turn the complete upload into an attachment and close the session."""
+        self.ensure_one()
+        if self.received_size != self.total_size:
+            raise UserError(_("The upload is not complete."))
+        attachment = (
+            self.env["ir.attachment"]
+            .sudo()
+            ._create_from_paths(
+                [{"name": name, "mimetype": self.mimetype or "application/octet-stream", "res_model": res_model}],
+                [self._get_tmp_path()],
+            )
+        )
+        self.unlink()
+        return attachment
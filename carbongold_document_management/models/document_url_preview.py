@@ -0,0 +1,129 @@
+# Part of Odoo. See LICENSE file for full copyright and licensing details.
+
+import logging
+from datetime import timedelta
+
+import requests
+from lxml import etree
+
+from odoo import api, fields, models
+
+from odoo.addons.carbongold_document_management.utils import normalize_url
+from odoo.addons.mail.tools import link_preview
+
+
+_logger = logging.getLogger(__name__)
+
+# days a fetched preview is reused, unless configured otherwise
+DEFAULT_URL_PREVIEW_TTL_DAYS = 7
+
+# hours a failed fetch is remembered before the page is tried again
+FAILED_URL_PREVIEW_TTL_HOURS = 24
+
+
+class DocumentUrlPreview(models.Model):
+    """Title and preview image of the pages link documents point to, by normalized URL.
+
+    Previews are fetched by the cron resolving the pending link documents,
+    never during a request, and reused until they expire: links to the same
+    page share a single fetch. Failed fetches are cached too, for a shorter
+    time, so that an unreachable site is not hit for every link to it.
+    """
+
+    _name = "document.url.preview"
+    _description = "Document URL Preview"
+    _log_access = False
+    _rec_name = "url"
+
+    url = fields.Char("Normalized URL", required=True, readonly=True)
+    title = fields.Char(readonly=True)
+    image_url = fields.Char("Preview Image", readonly=True)
+    state = fields.Selection([("done", "Fetched"), ("failed", "Failed")], required=True, readonly=True)
+    fetch_date = fields.Datetime(required=True, readonly=True)
+    expire_date = fields.Datetime(required=True, readonly=True, index=True)
+
+    _sql_constraints = [("url_unique", "UNIQUE(url)", "A URL has a single preview.")]
+
+    @api.model
+    def _get_cached(self, urls):
+        """Return the unexpired previews of ``urls``, by normalized URL, without fetching any.
+
+        Invalid URLs have no preview.
+        """
+        keys = {normalize_url(url) for url in urls if url} - {False}
+        if not keys:
+            return {}
+        previews = self.search([("url", "in", list(keys)), ("expire_date", ">", fields.Datetime.now())])
+        return {preview.url: preview for preview in previews}
+
+    @api.model
+    def _get_previews(self, urls):
+        """Return the previews of ``urls``, by normalized URL, fetching the missing and expired ones."""
+        previews = self._get_cached(urls)
+        missing = {normalize_url(url) for url in urls if url} - {False} - previews.keys()
+        if missing:
+            session = requests.Session()
+            for url in sorted(missing):
+                previews[url] = self._store(url, self._fetch(url, session))
+        return previews
+
+    @api.model
+    def _fetch(self, url, session):
+        """Return the title and image of the page at ``url``, or ``None`` when it cannot be read."""
+        try:
+            tags = link_preview.get_link_preview_from_url(url, session)
+        except (requests.exceptions.RequestException, ValueError, etree.LxmlError):
+            # e.g. invalid URLs, timeouts, TLS errors and unparsable pages, which are cached as failures
+            _logger.info("Cannot fetch the preview of %s", url, exc_info=True)
+            return None
+        if not tags:
+            return None
+        return {"title": tags.get("og_title"), "image_url": tags.get("og_image")}
+
+    @api.model
+    def _store(self, url, values):
+        """Save the fetch result ``values`` of ``url``, ``None`` for a failure, and return the preview."""
+        now = fields.Datetime.now()
+        if values is None:
+            ttl = timedelta(hours=FAILED_URL_PREVIEW_TTL_HOURS)
+        else:
+            ttl = timedelta(
+                days=int(
+                    self.env["ir.config_parameter"]
+                    .sudo()
+                    .get_param("carbongold_document_management.url_preview_ttl_days", DEFAULT_URL_PREVIEW_TTL_DAYS)
+                )
+            )
+        values = values or {}
+        self.env.cr.execute(
+            """
+            INSERT INTO document_url_preview (url, title, image_url, state, fetch_date, expire_date)
+            VALUES (%(url)s, %(title)s, %(image_url)s, %(state)s, %(now)s, %(expire)s)
+            ON CONFLICT (url) DO UPDATE
+               SET title = EXCLUDED.title,
+                   image_url = EXCLUDED.image_url,
+                   state = EXCLUDED.state,
+                   fetch_date = EXCLUDED.fetch_date,
+                   expire_date = EXCLUDED.expire_date
+            RETURNING id
+            """,
+            {
+                "url": url,
+                "title": values.get("title"),
+                "image_url": values.get("image_url"),
+                "state": "done" if values else "failed",
+                "now": now,
+                "expire": now + ttl,
+            },
+        )
+        preview = self.browse(self.env.cr.fetchone()[0])
+        preview.invalidate_recordset()
+        return preview
+
+    @api.autovacuum
+    def _gc_expired(self):
+        """Delete the previews expired for a while, which no pending link needs anymore."""
+        self.env.cr.execute(
+            "DELETE FROM document_url_preview WHERE expire_date < %s",
+            [fields.Datetime.now() - timedelta(days=DEFAULT_URL_PREVIEW_TTL_DAYS)],
+        )
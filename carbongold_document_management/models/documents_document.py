@@ -1,40 +1,973 @@
 # Part of Odoo. See LICENSE file for full copyright and licensing details.
 
-import re
+import base64
+import hashlib
+import logging
+import mimetypes
+import os
 import uuid
+from collections import Counter, defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timedelta
+from functools import partial
 
-from odoo import api, fields, models
+from PIL import Image
+
+from odoo import api, fields, models, tools
+from odoo.osv import expression
+from odoo.tools import SQL, escape_psql
+
+from odoo.addons.carbongold_document_management.utils import (
+    PrefixIndex,
+    TTLCache,
+    decode_cursor,
+    encode_cursor,
+    make_thumbnails,
+    normalize_url,
+    youtube_token,
+)
+
+
+_logger = logging.getLogger(__name__)
+
+# PostgreSQL text search configurations, by language code prefix
+TS_CONFIG_BY_LANG = {
+    "ar": "arabic",
+    "ca": "catalan",
+    "da": "danish",
+    "de": "german",
+    "el": "greek",
+    "en": "english",
+    "es": "spanish",
+    "fi": "finnish",
+    "fr": "french",
+    "hu": "hungarian",
+    "id": "indonesian",
+    "it": "italian",
+    "lt": "lithuanian",
+    "nb": "norwegian",
+    "nl": "dutch",
+    "pt": "portuguese",
+    "ro": "romanian",
+    "ru": "russian",
+    "sr": "serbian",
+    "sv": "swedish",
+    "tr": "turkish",
+}
+
+# fields feeding the search vector of a document
+SEARCH_VECTOR_FIELDS = {"name", "author", "doc_description", "document_category_ids"}
+
+# fields the thumbnail variants are generated from
+THUMBNAIL_SOURCE_FIELDS = {"portal_thumbnail", "thumbnail", "attachment_id"}
+
+# query results and rendered fragments of the public pages, retired by the portal cache token
+PORTAL_CACHE = TTLCache(max_size=1024, ttl=3600)
+
+# fields whose changes never show on the public pages
+PORTAL_CACHE_IGNORED_FIELDS = {"document_click_count", "document_download_count"}
+
+# keys of the rating histogram, one per star
+RATING_STARS = ("1", "2", "3", "4", "5")
+
+# sort options of the portal listing: field sorted in descending order, ties broken by descending id
+LISTING_SORTS = {
+    "recent": "write_date",
+    "popular": "popularity_score",
+    "trending": "trending_score",
+}
+
+# sorts following the scores of the popularity cron, which are cached under their own generation
+POPULARITY_SORTS = {"popular", "trending"}
+
+# generations of the portal cache: any change of the public pages, and the popularity rankings alone
+PORTAL_GENERATIONS = ("portal", "popularity")
+
+# weight of a download against a view in the popularity scores
+POPULARITY_DOWNLOAD_WEIGHT = 3
+# ratings the average rating of all documents counts for in each document's adjusted rating
+POPULARITY_RATING_PRIOR = 5
+# score points per star of adjusted rating above the average
+POPULARITY_RATING_WEIGHT = 0.5
+# days after which a document needs e times the engagement of a new one to trend as much
+TRENDING_DECAY_DAYS = 7
+
+# related documents kept for each document
+RELATED_DOCUMENTS_LIMIT = 6
+# days after which the related documents are recomputed anyway, for the new co-downloads
+RELATED_DOCUMENTS_MAX_AGE = 7
+# weight of each signal in the relatedness of two documents
+RELATED_CATEGORY_WEIGHT = 1.0
+RELATED_DOWNLOAD_WEIGHT = 0.5
+RELATED_NAME_WEIGHT = 1.0
+# fields whose changes call for recomputing the related documents
+RELATED_DOCUMENTS_FIELDS = {"name", "document_category_ids", "is_published"}
+
+
+def rating_star(rating):
+    """Return the histogram key of a rating, rounded half up to a whole star."""
+    return RATING_STARS[min(max(int(rating + 0.5), 1), 5) - 1]
 
 
 class Documents(models.Model):
     _name = "documents.document"
     _inherit = ["documents.document", "website.searchable.mixin", "website.published.multi.mixin"]
 
+    name = fields.Char(index="trigram")
     document_category_ids = fields.Many2many(comodel_name="category.category", string="Category")
-    author = fields.Char(string="Author")
-    doc_description = fields.Char(string="Description")
+    author = fields.Char(string="Author", index="trigram")
+    doc_description = fields.Char(string="Description", index="trigram")
+    search_text = fields.Char(store=False, search="_search_search_text")
     document_click_count = fields.Integer(default=0)
     document_download_count = fields.Integer(default=0)
     reviews = fields.One2many("document.review", "document_id")
     access_token = fields.Char("Security Token", default=lambda self: uuid.uuid4().hex)
-    # Computed rating fields
-    rating_avg = fields.Float("Average Rating", compute="_compute_rating_stats", store=True)
-    rating_count = fields.Integer("Review Count", compute="_compute_rating_stats", store=True)
+    # Rating statistics of the published reviews, maintained by delta (see _update_rating_stats)
+    rating_avg = fields.Float("Average Rating", readonly=True, copy=False)
+    rating_count = fields.Integer("Review Count", readonly=True, copy=False)
+    rating_sum = fields.Float("Rating Sum", readonly=True, copy=False)
+    rating_histogram = fields.Json("Rating Distribution", readonly=True, copy=False)
     allow_reviews = fields.Boolean(default=True)
-    
+    # Sort keys of the portal listing, recomputed by a cron (see _update_popularity_scores)
+    popularity_score = fields.Float("Popularity", readonly=True, copy=False, default=0.0)
+    trending_score = fields.Float("Trending Score", readonly=True, copy=False, default=0.0)
+    popularity_dirty = fields.Boolean(readonly=True, copy=False, default=True)
+    # Ids of the most related documents, best first, recomputed by a cron (see _update_related_documents)
+    related_document_data = fields.Json("Related Documents", readonly=True, copy=False)
+    related_date = fields.Datetime(readonly=True, copy=False)
+
+    # Metadata of the file content, so that pages never load the file itself
+    content_size = fields.Integer("Content Size", related="attachment_id.file_size", store=True)
+    content_checksum = fields.Char("Content Checksum", related="attachment_id.checksum", store=True)
+    content_extension = fields.Char("Content Extension", compute="_compute_content_extension", store=True)
+    has_content = fields.Boolean("Has Content", compute="_compute_has_content", store=True)
+
     # Thumbnail for Portal Documents
     portal_thumbnail = fields.Binary(attachment=True)
+    portal_thumbnail_card = fields.Binary(attachment=True, readonly=True)
+    portal_thumbnail_detail = fields.Binary(attachment=True, readonly=True)
+    portal_thumbnail_retina = fields.Binary(attachment=True, readonly=True)
+    portal_thumbnail_unique = fields.Char(readonly=True, copy=False)
+    portal_thumbnail_state = fields.Selection(
+        [("pending", "Pending"), ("done", "Generated"), ("none", "No Source")],
+        readonly=True,
+        copy=False,
+        index=True,
+    )
+    # Title and image of the linked page, fetched in the background (see _cron_fetch_url_previews)
+    url_preview_state = fields.Selection(
+        [("pending", "Pending"), ("done", "Fetched"), ("failed", "Failed")],
+        readonly=True,
+        copy=False,
+        index=True,
+    )
 
-    @api.depends("reviews.rating", "reviews.is_published")
-    def _compute_rating_stats(self):
-        for record in self:
-            reviews_with_rating = record.reviews.filtered(lambda r: r.rating > 0 and r.is_published and not r.is_reply)
-            if reviews_with_rating:
-                record.rating_avg = sum(reviews_with_rating.mapped("rating")) / len(reviews_with_rating)
-                record.rating_count = len(reviews_with_rating)
+    def init(self):
+        super().init()
+        cr = self.env.cr
+        cr.execute("ALTER TABLE documents_document ADD COLUMN IF NOT EXISTS search_vector tsvector")
+        tools.create_index(cr, "documents_document_search_vector_index", self._table, ["search_vector"], "gin")
+        if not self.env["ir.config_parameter"].sudo().get_param("carbongold_document_management.search_ts_config"):
+            website = self.env["website"].sudo().search([], limit=1)
+            self.env["ir.config_parameter"].sudo().set_param(
+                "carbongold_document_management.search_ts_config",
+                self._get_ts_config_for_lang(website.default_lang_id.code or "en_US"),
+            )
+        for field_name in LISTING_SORTS.values():
+            tools.create_index(
+                cr,
+                f"documents_document_published_{field_name}_index",
+                self._table,
+                [f"{field_name} DESC", "id DESC"],
+                where="is_published",
+            )
+        tools.create_index(
+            cr, "documents_document_popularity_dirty_index", self._table, ["id"], where="popularity_dirty"
+        )
+        tools.create_index(
+            cr, "documents_document_related_date_index", self._table, ["related_date NULLS FIRST"], where="is_published"
+        )
+        # documents listing a given one as related (see _invalidate_related_documents)
+        tools.create_index(
+            cr,
+            "documents_document_related_document_data_index",
+            self._table,
+            ["related_document_data jsonb_path_ops"],
+            "gin",
+        )
+        # generations of the portal cache entries and of the popularity rankings (see _get_portal_generation)
+        for kind in PORTAL_GENERATIONS:
+            sequence = SQL.identifier(f"documents_document_{kind}_generation_seq")
+            cr.execute(SQL("CREATE SEQUENCE IF NOT EXISTS %s", sequence))
+        cr.execute("SELECT id FROM documents_document WHERE search_vector IS NULL")
+        self.browse([row[0] for row in cr.fetchall()])._update_search_vector()
+
+    @api.model_create_multi
+    def create(self, vals_list):
+        for vals in vals_list:
+            if THUMBNAIL_SOURCE_FIELDS.intersection(vals):
+                vals["portal_thumbnail_state"] = "pending"
+            if vals.get("url"):
+                vals["url_preview_state"] = "pending"
+        documents = super().create(vals_list)
+        documents._update_search_vector()
+        if any(document.portal_thumbnail_state == "pending" for document in documents):
+            self._trigger_thumbnail_generation()
+        if any(document.url_preview_state == "pending" for document in documents):
+            self._trigger_url_preview_fetch()
+        if documents._affects_portal():
+            self._invalidate_portal_cache()
+        return documents
+
+    def write(self, vals):
+        if THUMBNAIL_SOURCE_FIELDS.intersection(vals):
+            vals = dict(vals, portal_thumbnail_state="pending")
+            self._trigger_thumbnail_generation()
+        if vals.get("url"):
+            vals = dict(vals, url_preview_state="pending")
+            self._trigger_url_preview_fetch()
+        affects_portal = self._affects_portal(vals)
+        if RELATED_DOCUMENTS_FIELDS.intersection(vals):
+            self._invalidate_related_documents()
+        res = super().write(vals)
+        if SEARCH_VECTOR_FIELDS.intersection(vals):
+            self._update_search_vector()
+        if affects_portal:
+            self._invalidate_portal_cache()
+        return res
+
+    def unlink(self):
+        affects_portal = self._affects_portal()
+        self._invalidate_related_documents()
+        res = super().unlink()
+        if affects_portal:
+            self._invalidate_portal_cache()
+        return res
+
+    @api.model
+    def _get_ts_config_for_lang(self, lang_code):
+        """Return the PostgreSQL text search configuration stemming ``lang_code``."""
+        config = TS_CONFIG_BY_LANG.get((lang_code or "").split("_")[0], "simple")
+        self.env.cr.execute("SELECT 1 FROM pg_ts_config WHERE cfgname = %s", [config])
+        return config if self.env.cr.rowcount else "simple"
+
+    @api.model
+    def _get_search_ts_config(self):
+        return (
+            self.env["ir.config_parameter"].sudo().get_param("carbongold_document_management.search_ts_config")
+            or "simple"
+        )
+
+    def _update_search_vector(self):
+        """Rebuild the weighted full-text vector of ``self``.
+
+        Names weigh the most, then authors and category names, then descriptions.
+        Call :meth:`_rebuild_search_index` after changing the text search configuration.
+        """
+        if not self.ids:
+            return
+        self.flush_recordset(["name", "author", "doc_description", "document_category_ids"])
+        self.env["category.category"].flush_model(["name"])
+        field = self._fields["document_category_ids"]
+        config = self._get_search_ts_config()
+        self.env.cr.execute(
+            SQL(
+                """
+                UPDATE documents_document doc
+                   SET search_vector =
+                        setweight(to_tsvector(%(config)s::regconfig, COALESCE(doc.name, '')), 'A')
+                     || setweight(to_tsvector(%(config)s::regconfig, COALESCE(doc.author, '')), 'B')
+                     || setweight(to_tsvector(%(config)s::regconfig, COALESCE(categ.names, '')), 'B')
+                     || setweight(to_tsvector(%(config)s::regconfig, COALESCE(doc.doc_description, '')), 'C')
+                  FROM (
+                    SELECT doc.id, string_agg(category.name, ' ') AS names
+                      FROM documents_document doc
+                 LEFT JOIN %(relation)s rel ON rel.%(column1)s = doc.id
+                 LEFT JOIN category_category category ON category.id = rel.%(column2)s
+                     WHERE doc.id IN %(ids)s
+                  GROUP BY doc.id
+                  ) categ
+                 WHERE doc.id = categ.id
+                """,
+                config=config,
+                relation=SQL.identifier(field.relation),
+                column1=SQL.identifier(field.column1),
+                column2=SQL.identifier(field.column2),
+                ids=tuple(self.ids),
+            )
+        )
+
+    @api.model
+    def _rebuild_search_index(self):
+        self.with_context(active_test=False).search([])._update_search_vector()
+
+    def _get_fulltext_sql(self, search):
+        """Return the SQL condition matching ``search`` and its relevance rank.
+
+        Stemmed words are matched against the search vector; when pg_trgm is
+        available, names and authors are also matched fuzzily by trigrams.
+        """
+        config = self._get_search_ts_config()
+        tsquery = SQL("websearch_to_tsquery(%s::regconfig, %s)", config, search)
+        vector = SQL.identifier(self._table, "search_vector")
+        name = SQL.identifier(self._table, "name")
+        author = SQL.identifier(self._table, "author")
+        if self.env.registry.has_trigram:
+            condition = SQL("(%s @@ %s OR %s <%% %s OR %s <%% %s)", vector, tsquery, search, name, search, author)
+            rank = SQL("(ts_rank_cd(%s, %s) + word_similarity(%s, %s))", vector, tsquery, search, name)
+        else:
+            # the wildcards typed in the search match themselves
+            pattern = f"%{escape_psql(search)}%"
+            condition = SQL("(%s @@ %s OR %s ILIKE %s)", vector, tsquery, name, pattern)
+            rank = SQL("ts_rank_cd(%s, %s)", vector, tsquery)
+        return condition, rank
+
+    def _search_search_text(self, operator, value):
+        if operator not in ("=", "ilike") or not value:
+            raise NotImplementedError(f"Unsupported search: search_text {operator} {value!r}")
+        query = self.sudo().with_context(active_test=False)._search([])
+        condition, _rank = self._get_fulltext_sql(value)
+        query.add_where(condition)
+        return [("id", "in", query)]
+
+    @api.model
+    def _search_fulltext(self, search, domain=None, offset=0, limit=None):
+        """Return the documents of ``domain`` matching ``search``, most relevant first."""
+        query = self._search(expression.AND([domain or [], [("search_text", "=", search)]]), offset=offset, limit=limit)
+        _condition, rank = self._get_fulltext_sql(search)
+        query.order = SQL("%s DESC, %s DESC", rank, SQL.identifier(self._table, "id"))
+        return self.browse(query)
+
+    @api.model
+    def _estimate_count(self, domain, threshold=1000):
+        """Count the records matching ``domain`` exactly up to ``threshold``.
+
+        Larger result sets are not counted: the planner's row estimate is
+        returned instead, so the cost of the count stays bounded.
+        """
+        count = self.search_count(domain, limit=threshold)
+        if count < threshold:
+            return count
+        query = self._search(domain)
+        self.env.cr.execute(SQL("EXPLAIN (FORMAT JSON) %s", query.select()))
+        plan = self.env.cr.fetchone()[0]
+        return max(threshold, int(plan[0]["Plan"]["Plan Rows"]))
+
+    @api.model
+    def _search_listing(self, domain, sort="recent", cursor=None, offset=0, limit=20):
+        """Return a page of the portal listing and the cursors of its neighbour pages.
+
+        Without ``cursor`` the page starts at ``offset``. With a cursor, the
+        page seeks right after (or before) the row the cursor encodes on the
+        ``(sort key, id)`` index, so deep pages cost the same as the first one.
+
+        :return: tuple ``(documents, previous page cursor, next page cursor)``,
+            the cursors being ``None`` when there is no such page
+        """
+        field_name = LISTING_SORTS[sort]
+        column = SQL.identifier(self._table, field_name)
+        id_column = SQL.identifier(self._table, "id")
+        position = self._decode_listing_cursor(cursor, sort)
+        backward = bool(position and position[0] == "before")
+        query = self._search(
+            domain,
+            offset=0 if position else offset,
+            limit=limit + 1,
+            order=f"{field_name} ASC, id ASC" if backward else f"{field_name} DESC, id DESC",
+        )
+        if position:
+            _direction, value, record_id = position
+            if backward:
+                query.add_where(SQL("(%s, %s) > (%s, %s)", column, id_column, value, record_id))
+            else:
+                query.add_where(SQL("(%s, %s) < (%s, %s)", column, id_column, value, record_id))
+        self.env.cr.execute(query.select(id_column, column))
+        rows = self.env.cr.fetchall()
+        has_more = len(rows) > limit
+        rows = rows[:limit]
+        if backward:
+            rows.reverse()
+        documents = self.browse([row[0] for row in rows])
+        if not rows:
+            return documents, None, None
+
+        has_previous = has_more if backward else bool(position or offset)
+        has_next = True if backward else has_more
+        previous_cursor = self._encode_listing_cursor(sort, "before", *rows[0]) if has_previous else None
+        next_cursor = self._encode_listing_cursor(sort, "after", *rows[-1]) if has_next else None
+        return documents, previous_cursor, next_cursor
+
+    @api.model
+    def _encode_listing_cursor(self, sort, direction, record_id, value):
+        return encode_cursor(sort, direction, value, record_id)
+
+    @api.model
+    def _decode_listing_cursor(self, cursor, sort):
+        """Return the ``(direction, sort value, id)`` encoded in ``cursor``.
+
+        Malformed cursors, or cursors of another sort, give ``None``.
+        """
+        values = decode_cursor(cursor)
+        try:
+            cursor_sort, direction, value, record_id = values
+            if cursor_sort != sort or direction not in ("before", "after"):
+                return None
+            if self._fields[LISTING_SORTS[sort]].type == "datetime":
+                value = datetime.fromisoformat(value)
             else:
-                record.rating_avg = 0.0
-                record.rating_count = 0
+                value = float(value)
+            return direction, value, int(record_id)
+        except (TypeError, ValueError):
+            return None
+
+    @api.model
+    def _get_category_counts(self, domain):
+        """Return the number of documents matching ``domain`` in each category.
+
+        A document counts for its categories and for all their ancestors, so
+        that parent facets match the descendant-aware category filter. The
+        counts come from one grouped query over the category relation table.
+
+        :return: dict mapping category ids to their document count, categories
+            without any matching document being left out
+        """
+        return self._get_portal_cached(("category_counts", repr(domain)), lambda: self._read_category_counts(domain))
+
+    @api.model
+    def _read_category_counts(self, domain, with_ancestors=True):
+        """Count the documents matching ``domain`` per category, in one grouped query.
+
+        :param with_ancestors: count the documents for the ancestors of their
+            categories too, or only for the categories they are tagged with
+        """
+        field = self._fields["document_category_ids"]
+        query = self._search(domain)
+        if with_ancestors:
+            category = SQL(
+                """
+                JOIN category_category category ON category.id = rel.%s
+          CROSS JOIN LATERAL unnest(string_to_array(rtrim(category.parent_path, '/'), '/')) AS ancestor(id)
+                """,
+                SQL.identifier(field.column2),
+            )
+            category_id = SQL("ancestor.id::int")
+        else:
+            category = SQL()
+            category_id = SQL("rel.%s", SQL.identifier(field.column2))
+        self.env.cr.execute(
+            SQL(
+                """
+                SELECT %(category_id)s, COUNT(DISTINCT rel.%(column1)s)
+                  FROM %(relation)s rel
+                       %(category)s
+                 WHERE rel.%(column1)s IN (%(documents)s)
+              GROUP BY 1
+                """,
+                category_id=category_id,
+                category=category,
+                relation=SQL.identifier(field.relation),
+                column1=SQL.identifier(field.column1),
+                documents=query.select(),
+            )
+        )
+        return dict(self.env.cr.fetchall())
+
+    @api.model
+    def _get_portal_generation(self, kind="portal"):
+        """Return the current generation of the portal cache entries, shared by all the workers.
+
+        The generation is a database sequence, bumped once the changes that
+        retire the cached entries are committed (see :meth:`_invalidate_portal_cache`).
+        It is read once per transaction.
+
+        :param kind: one of :data:`PORTAL_GENERATIONS`, ``popularity`` being
+            the generation of the rankings of the popularity sorts only
+        """
+        cr = self.env.cr
+        cache_key = f"{kind}_generation"
+        generation = cr.cache.get(cache_key)
+        if generation is None:
+            cr.execute(SQL("SELECT last_value FROM %s", SQL.identifier(f"documents_document_{kind}_generation_seq")))
+            generation = cr.cache[cache_key] = cr.fetchone()[0]
+            # the next transaction may see a newer generation
+            cr.postcommit.add(partial(cr.cache.pop, cache_key, None))
+            cr.postrollback.add(partial(cr.cache.pop, cache_key, None))
+        return generation
+
+    @api.model
+    def _get_sort_generation(self, sort):
+        """Return what the cache entries of a listing sorted by ``sort`` are keyed on besides the portal generation."""
+        return self._get_portal_generation("popularity") if sort in POPULARITY_SORTS else None
+
+    @api.model
+    @tools.ormcache(cache="templates")
+    def _get_portal_template_token(self):
+        """Return the token of the current generation of the website templates, for fragments."""
+        return uuid.uuid4().hex
+
+    @api.model
+    def _get_portal_cached(self, key, compute):
+        """Return the value of ``key`` in the portal cache, calling ``compute`` on a miss.
+
+        The key is completed with the database and the current cache generation;
+        ``compute`` must return a value that is safe to share between
+        requests, such as ids or rendered HTML, but never records.
+        """
+        key = (self.env.cr.dbname, self._get_portal_generation(), *key)
+        value = PORTAL_CACHE.get(key)
+        if value is None:
+            value = compute()
+            PORTAL_CACHE.set(key, value)
+        return value
+
+    @api.model
+    def _get_suggestion_index(self, website_id, lang):
+        """Return the prefix index of the published document names and category names of a website.
+
+        The index is built on the first suggestion asked to the worker and
+        kept in the portal cache, so the changes retiring the portal cache
+        also retire it (see :meth:`_invalidate_portal_cache`).
+        """
+        return self._get_portal_cached(
+            ("suggestion_index", website_id, lang), lambda: self._build_suggestion_index(website_id, lang)
+        )
+
+    @api.model
+    def _build_suggestion_index(self, website_id, lang):
+        website = self.env["website"].browse(website_id)
+        documents = self.with_context(lang=lang).search_read(
+            expression.AND([[("is_published", "=", True)], website.website_domain()]), ["name"]
+        )
+        categories = self.env["category.category"].with_context(lang=lang).search_read([], ["name"])
+        return PrefixIndex(
+            [(document["name"], ("document", document["id"], document["name"])) for document in documents]
+            + [(category["name"], ("category", category["id"], category["name"])) for category in categories]
+        )
+
+    @api.model
+    def _get_suggestions(self, term, limit=8):
+        """Return the documents and categories whose name has a word starting with ``term``, for the typeahead."""
+        index = self.sudo()._get_suggestion_index(self.env["website"].get_current_website().id, self.env.lang)
+        return [
+            {
+                "type": kind,
+                "name": name,
+                "url": f"/document/{record_id}" if kind == "document" else f"/documents?category_ids={record_id}",
+            }
+            for kind, record_id, name in index.search(term, limit=limit)
+        ]
+
+    @api.model
+    def _invalidate_portal_cache(self, kind="portal"):
+        """Retire the portal cache entries of every worker once the current transaction is committed.
+
+        Bumping the generation only after the commit keeps other requests
+        from caching the data of before the change under the new generation.
+
+        :param kind: generation to bump, see :meth:`_get_portal_generation`
+        """
+        cr = self.env.cr
+        bump_key = f"{kind}_generation_bump"
+        if cr.postcommit.data.get(bump_key):
+            return
+        cr.postcommit.data[bump_key] = True
+
+        @cr.postcommit.add
+        def bump_generation():
+            # sequences are not transactional: the bump holds whatever happens to the cursor next
+            cr.execute(SQL("SELECT nextval(%s)", f"documents_document_{kind}_generation_seq"))
+            cr.cache.pop(f"{kind}_generation", None)
+
+    @api.model
+    def _get_portal_cache_stats(self):
+        return PORTAL_CACHE.stats()
+
+    @api.model
+    def _get_listing_validators(self, sort):
+        """Return what the HTTP validators of the public listing sorted by ``sort`` are derived from.
+
+        Every change the listing shows retires the portal cache (see
+        :meth:`_invalidate_portal_cache`), the new popularity scores retire
+        the popularity sorts, and every change of the website templates
+        retires the ``templates`` cache, so their generations cover the whole
+        page without reading any table.
+
+        :return: tuple ``(newest write_date, fingerprint)``, the date being
+            unknown here
+        """
+        return None, (
+            self._get_portal_generation(),
+            self._get_sort_generation(sort),
+            self.env.registry.cache_sequences.get("templates"),
+        )
+
+    def _get_detail_validators(self):
+        """Return what the HTTP validators of the public page of ``self`` are derived from.
+
+        :return: tuple ``(newest write_date, fingerprint)``, see :meth:`_get_listing_validators`
+        """
+        self.ensure_one()
+        field = self._fields["document_category_ids"]
+        self.env.cr.execute(
+            SQL(
+                """
+                SELECT GREATEST(doc.write_date, categ.write_date, review.write_date),
+                       categ.count, review.count, doc.related_date
+                  FROM documents_document doc,
+                       (SELECT MAX(category.write_date) AS write_date, COUNT(*) AS count
+                          FROM %(relation)s rel
+                          JOIN category_category category ON category.id = rel.%(column2)s
+                         WHERE rel.%(column1)s = %(document_id)s) categ,
+                       (SELECT MAX(write_date) AS write_date, COUNT(*) AS count
+                          FROM document_review
+                         WHERE document_id = %(document_id)s AND is_published) review
+                 WHERE doc.id = %(document_id)s
+                """,
+                relation=SQL.identifier(field.relation),
+                column1=SQL.identifier(field.column1),
+                column2=SQL.identifier(field.column2),
+                document_id=self.id,
+            )
+        )
+        last_modified, *fingerprint = self.env.cr.fetchone()
+        return last_modified, (*fingerprint, self.env.registry.cache_sequences.get("templates"))
+
+    def _affects_portal(self, vals=None):
+        """Tell whether changing these documents with ``vals`` shows on the public pages."""
+        if vals is not None and (not set(vals) - PORTAL_CACHE_IGNORED_FIELDS):
+            return False
+        return "is_published" in (vals or {}) or any(self.sudo().mapped("is_published"))
+
+    @api.depends("attachment_id.name", "attachment_id.mimetype")
+    def _compute_content_extension(self):
+        for document in self:
+            attachment = document.attachment_id
+            extension = os.path.splitext(attachment.name or "")[1]
+            if not extension and attachment.mimetype:
+                extension = mimetypes.guess_extension(attachment.mimetype.split(";")[0]) or ""
+            document.content_extension = extension.lstrip(".").lower() or False
+
+    @api.depends("type", "attachment_id.checksum")
+    def _compute_has_content(self):
+        for document in self:
+            document.has_content = document.type == "binary" and bool(document.attachment_id.checksum)
+
+    @api.model
+    def _update_rating_stats(self, removed=(), added=()):
+        """Apply review rating changes to the rating statistics of documents by delta.
+
+        The sum, count, average and histogram are updated in SQL relative to
+        their current value, so that concurrent reviews of one document add up
+        and no review is ever read again.
+
+        :param removed: ``(document_id, rating)`` of the ratings no longer counted
+        :param added: ``(document_id, rating)`` of the ratings newly counted
+        """
+        deltas = defaultdict(lambda: [0.0, 0, Counter()])
+        for sign, ratings in ((-1, removed), (1, added)):
+            for document_id, rating in ratings:
+                delta = deltas[document_id]
+                delta[0] += sign * rating
+                delta[1] += sign
+                delta[2][rating_star(rating)] += sign
+        for document_id, (sum_delta, count_delta, star_deltas) in deltas.items():
+            if not sum_delta and not any(star_deltas.values()):
+                continue
+            histogram = SQL(", ").join(
+                SQL("%s::text, COALESCE((rating_histogram->>%s)::int, 0) + %s", star, star, star_deltas[star])
+                for star in RATING_STARS
+            )
+            self.env.cr.execute(
+                SQL(
+                    """
+                UPDATE documents_document
+                   SET rating_sum = COALESCE(rating_sum, 0) + %(sum_delta)s,
+                       rating_count = COALESCE(rating_count, 0) + %(count_delta)s,
+                       rating_avg = COALESCE(
+                           (COALESCE(rating_sum, 0) + %(sum_delta)s) / NULLIF(COALESCE(rating_count, 0) + %(count_delta)s, 0),
+                           0
+                       ),
+                       rating_histogram = jsonb_build_object(%(histogram)s),
+                       popularity_dirty = TRUE
+                 WHERE id = %(document_id)s
+                """,
+                    sum_delta=sum_delta,
+                    count_delta=count_delta,
+                    histogram=histogram,
+                    document_id=document_id,
+                )
+            )
+        self.browse(deltas).invalidate_recordset([
+            "rating_sum",
+            "rating_count",
+            "rating_avg",
+            "rating_histogram",
+            "popularity_dirty",
+        ])
+
+    @api.model
+    def _update_popularity_scores(self, batch_size=1000, auto_commit=False, force=False):
+        """Recompute the popularity and trending scores of the documents whose inputs changed.
+
+        Engagement weighs downloads more than views. Ratings are adjusted
+        towards the average rating of all documents, so that a single 5 star
+        review does not outrank hundreds of good ones. The trending score adds
+        the creation date, scaled so that a document must gain e times more
+        engagement every ``TRENDING_DECAY_DAYS`` to keep its rank: like a decay
+        with age, but stable, so the scores never need recomputing as time passes.
+
+        The scores are written in SQL, without touching ``write_date``. Scores
+        of unchanged documents are not refreshed when the average rating moves,
+        recompute them all with ``force``.
+
+        :return: the number of documents whose scores were recomputed
+        """
+        cr = self.env.cr
+        if force:
+            cr.execute("UPDATE documents_document SET popularity_dirty = TRUE")
+        cr.execute("SELECT COALESCE(SUM(rating_sum) / NULLIF(SUM(rating_count), 0), 0) FROM documents_document")
+        mean_rating = cr.fetchone()[0]
+        updated = 0
+        while True:
+            cr.execute(
+                """
+                UPDATE documents_document doc
+                   SET popularity_score = scores.popularity,
+                       trending_score = scores.popularity
+                           + EXTRACT(EPOCH FROM doc.create_date) / %(decay_seconds)s,
+                       popularity_dirty = FALSE
+                  FROM (
+                    SELECT id,
+                           LN(1 + COALESCE(document_click_count, 0) + %(download_weight)s * COALESCE(document_download_count, 0))
+                           + %(rating_weight)s * (
+                               (%(prior)s * %(mean_rating)s + COALESCE(rating_sum, 0))
+                               / (%(prior)s + COALESCE(rating_count, 0))
+                               - %(mean_rating)s
+                           ) AS popularity
+                      FROM documents_document
+                     WHERE popularity_dirty
+                     ORDER BY id
+                     LIMIT %(limit)s
+                       FOR UPDATE SKIP LOCKED
+                  ) scores
+                 WHERE doc.id = scores.id
+                """,
+                {
+                    "decay_seconds": TRENDING_DECAY_DAYS * 86400,
+                    "download_weight": POPULARITY_DOWNLOAD_WEIGHT,
+                    "rating_weight": POPULARITY_RATING_WEIGHT,
+                    "prior": POPULARITY_RATING_PRIOR,
+                    "mean_rating": mean_rating,
+                    "limit": batch_size,
+                },
+            )
+            if not cr.rowcount:
+                break
+            updated += cr.rowcount
+            if auto_commit:
+                cr.commit()
+        if updated:
+            self.invalidate_model(["popularity_score", "trending_score", "popularity_dirty"])
+            # only the popularity sorts show the scores, the other cached pages are kept
+            self._invalidate_portal_cache("popularity")
+        return updated
+
+    @api.model
+    def _cron_update_popularity_scores(self):
+        updated = self._update_popularity_scores(auto_commit=True)
+        if updated:
+            _logger.info("Recomputed the popularity scores of %s documents", updated)
+
+    def _invalidate_related_documents(self):
+        """Have the related documents of ``self``, and of the documents listing them, recomputed."""
+        if not self.ids:
+            return
+        self.env.cr.execute(
+            """
+            UPDATE documents_document
+               SET related_date = NULL
+             WHERE id IN %s
+                OR related_document_data @> ANY(%s::jsonb[])
+            """,
+            [tuple(self.ids), [f"[{document_id}]" for document_id in self.ids]],
+        )
+        self.invalidate_model(["related_date"])
+
+    @api.model
+    def _get_related_scores_sql(self, document_ids):
+        """Return the query scoring the documents related to ``document_ids``.
+
+        Documents sharing categories score by the share of their categories in
+        common, those downloaded by the same visitors by the number of such
+        visitors on a log scale, and, with pg_trgm, those with similar names by
+        their trigram similarity. The query returns rows ``(id, related id, score)``.
+        """
+        field = self._fields["document_category_ids"]
+        signals = [
+            SQL(
+                """
+                SELECT rel.%(column1)s AS id, other.%(column1)s AS related_id,
+                       %(weight)s * COUNT(*) / SQRT(
+                           (SELECT COUNT(*) FROM %(relation)s own WHERE own.%(column1)s = rel.%(column1)s)
+                           * (SELECT COUNT(*) FROM %(relation)s own WHERE own.%(column1)s = other.%(column1)s)
+                       ) AS score
+                  FROM %(relation)s rel
+                  JOIN %(relation)s other ON other.%(column2)s = rel.%(column2)s AND other.%(column1)s != rel.%(column1)s
+                 WHERE rel.%(column1)s = ANY(%(ids)s)
+              GROUP BY rel.%(column1)s, other.%(column1)s
+                """,
+                relation=SQL.identifier(field.relation),
+                column1=SQL.identifier(field.column1),
+                column2=SQL.identifier(field.column2),
+                weight=RELATED_CATEGORY_WEIGHT,
+                ids=list(document_ids),
+            ),
+            SQL(
+                """
+                  WITH own AS (
+                    SELECT DISTINCT partner_id, document_id
+                      FROM document_analytics_event
+                     WHERE kind = 'download' AND partner_id IS NOT NULL AND document_id = ANY(%(ids)s)
+                ), other AS (
+                    SELECT DISTINCT partner_id, document_id
+                      FROM document_analytics_event
+                     WHERE kind = 'download' AND partner_id IN (SELECT partner_id FROM own)
+                )
+                SELECT own.document_id AS id, other.document_id AS related_id,
+                       %(weight)s * LN(1 + COUNT(*)) AS score
+                  FROM own
+                  JOIN other ON other.partner_id = own.partner_id AND other.document_id != own.document_id
+              GROUP BY own.document_id, other.document_id
+                """,
+                weight=RELATED_DOWNLOAD_WEIGHT,
+                ids=list(document_ids),
+            ),
+        ]
+        if self.env.registry.has_trigram:
+            signals.append(
+                SQL(
+                    """
+                SELECT doc.id, similar.id AS related_id, %(weight)s * similar.similarity AS score
+                  FROM documents_document doc
+            CROSS JOIN LATERAL (
+                    SELECT other.id, similarity(other.name, doc.name) AS similarity
+                      FROM documents_document other
+                     WHERE other.name %% doc.name AND other.id != doc.id AND other.is_published
+                  ORDER BY other.name <-> doc.name, other.id
+                     LIMIT 50
+                ) similar
+                 WHERE doc.id = ANY(%(ids)s)
+                """,
+                    weight=RELATED_NAME_WEIGHT,
+                    ids=list(document_ids),
+                )
+            )
+        return SQL(" UNION ALL ").join(SQL("(%s)", signal) for signal in signals)
+
+    @api.model
+    def _update_related_documents(self, batch_size=100, auto_commit=False):
+        """Recompute the related documents of the published documents that need it.
+
+        Documents whose name, categories or publication changed are handled
+        first (see :meth:`_invalidate_related_documents`), then those computed
+        more than ``RELATED_DOCUMENTS_MAX_AGE`` days ago. The ids are stored
+        on the document itself, so the detail page reads them with the document.
+
+        :return: the number of documents whose related documents were recomputed
+        """
+        cr = self.env.cr
+        updated = 0
+        stale_date = fields.Datetime.now() - timedelta(days=RELATED_DOCUMENTS_MAX_AGE)
+        while True:
+            cr.execute(
+                """
+                SELECT id FROM documents_document
+                 WHERE is_published AND (related_date IS NULL OR related_date < %s)
+              ORDER BY related_date NULLS FIRST, id
+                 LIMIT %s
+                   FOR UPDATE SKIP LOCKED
+                """,
+                [stale_date, batch_size],
+            )
+            document_ids = [row[0] for row in cr.fetchall()]
+            if not document_ids:
+                break
+            cr.execute(
+                SQL(
+                    """
+                UPDATE documents_document doc
+                   SET related_document_data = COALESCE(ranked.related_ids, '[]'::jsonb),
+                       related_date = NOW() AT TIME ZONE 'UTC'
+                  FROM unnest(%(ids)s::int[]) AS batch(id)
+             LEFT JOIN (
+                    SELECT id, jsonb_agg(related_id ORDER BY score DESC, related_id DESC) AS related_ids
+                      FROM (
+                        SELECT scores.id, scores.related_id, SUM(scores.score) AS score,
+                               ROW_NUMBER() OVER (
+                                   PARTITION BY scores.id ORDER BY SUM(scores.score) DESC, scores.related_id DESC
+                               ) AS rank
+                          FROM (%(scores)s) scores
+                          JOIN documents_document related ON related.id = scores.related_id AND related.is_published
+                      GROUP BY scores.id, scores.related_id
+                      ) best
+                     WHERE rank <= %(limit)s
+                  GROUP BY id
+                ) ranked ON ranked.id = batch.id
+                 WHERE doc.id = batch.id
+                """,
+                    ids=document_ids,
+                    scores=self._get_related_scores_sql(document_ids),
+                    limit=RELATED_DOCUMENTS_LIMIT,
+                )
+            )
+            updated += len(document_ids)
+            if auto_commit:
+                cr.commit()
+        if updated:
+            self.invalidate_model(["related_document_data", "related_date"])
+        return updated
+
+    @api.model
+    def _cron_update_related_documents(self):
+        updated = self._update_related_documents(auto_commit=True)
+        if updated:
+            _logger.info("Recomputed the related documents of %s documents", updated)
+
+    def _get_related_documents(self):
+        """Return the published documents related to ``self``, best first."""
+        self.ensure_one()
+        related = self.browse(self.related_document_data or []).exists()
+        return related.filtered("is_published")
+
+    def _get_rating_distribution(self):
+        """Return the share of each star among the ratings, in percent, from 5 stars down."""
+        self.ensure_one()
+        histogram = self.rating_histogram or {}
+        distribution = []
+        for star in reversed(RATING_STARS):
+            count = histogram.get(star, 0)
+            percent = round(100 * count / self.rating_count) if self.rating_count else 0
+            distribution.append((int(star), count, percent))
+        return distribution
+
+    def update_categories(self, add_category_ids=(), remove_category_ids=(), count_domain=None):
+        """Add and remove categories on all of ``self`` at once, for the documents inspector.
+
+        All the changes are made by a single write, and the category counts
+        the search panel shows come back with them.
+
+        :param count_domain: domain of the documents the counts are made on,
+            or ``None`` to skip them
+        :return: dict mapping category ids to their number of documents
+            matching ``count_domain``, directly tagged with them
+        """
+        commands = [fields.Command.link(category_id) for category_id in add_category_ids]
+        commands += [fields.Command.unlink(category_id) for category_id in remove_category_ids]
+        if self and commands:
+            self.write({"document_category_ids": commands})
+        if count_domain is None:
+            return {}
+        return self._read_category_counts(count_domain, with_ancestors=False)
 
     def action_publish(self):
         for record in self:
@@ -66,9 +999,30 @@ class Documents(models.Model):
             "fetch_fields": fetch_fields,
             "mapping": mapping,
             "icon": "fa-rss-square",
-            "order": "name desc, id desc" if "name desc" in order else "name asc, id desc",
+            "order": self._get_search_order(order),
         }
 
+    @api.model
+    def _get_search_order(self, order):
+        """Return the order of the website search results for the ``order`` option of the search box."""
+        for sort in ("popular", "trending"):
+            if order and order.startswith(sort):
+                return f"{LISTING_SORTS[sort]} desc, id desc"
+        return "name desc, id desc" if "name desc" in order else "name asc, id desc"
+
+    @api.model
+    def _search_fetch(self, search_detail, search, limit, order):
+        if not search:
+            return super()._search_fetch(search_detail, search, limit, order)
+        model = self.sudo() if search_detail.get("requires_sudo") else self
+        domain = expression.AND(search_detail["base_domain"])
+        results = model._search_fulltext(search, domain, limit=limit)
+        if limit and len(results) == limit:
+            count = model.search_count(expression.AND([domain, [("search_text", "=", search)]]))
+        else:
+            count = len(results)
+        return results, count
+
     def _search_render_results(self, fetch_fields, mapping, icon, limit):
         results_data = super()._search_render_results(fetch_fields, mapping, icon, limit)
         with_image = "image_url" in mapping
@@ -83,12 +1037,212 @@ class Documents(models.Model):
                     data["image_url"] = "/base/static/img/avatar_grey.png"
         return results_data
 
+    @api.model
+    def _trigger_thumbnail_generation(self):
+        cron = self.env.ref(
+            "carbongold_document_management.ir_cron_generate_thumbnail_variants", raise_if_not_found=False
+        )
+        if cron:
+            cron._trigger()
+
+    def _get_thumbnail_source(self):
+        """Return the raw image the thumbnail variants of ``self`` are made from.
+
+        The uploaded portal thumbnail comes first, then the preview of the
+        first page the documents app renders for PDFs, then image files.
+        """
+        self.ensure_one()
+        if self.type == "url":
+            return None
+        for field_name in ("portal_thumbnail", "thumbnail"):
+            if self[field_name]:
+                return base64.b64decode(self[field_name])
+        if self.attachment_id and (self.attachment_id.mimetype or "").startswith("image/"):
+            return self.attachment_id.raw
+        return None
+
+    def _generate_thumbnail_variants(self, workers=0):
+        """Generate the thumbnail variants of ``self``.
+
+        :param workers: number of processes the images are resized in, in
+            parallel, or 0 to resize them in the current process
+        """
+        sources = {document: document._get_thumbnail_source() for document in self}
+        sources = {document: source for document, source in sources.items() if source}
+        if workers:
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                jobs = {document: executor.submit(make_thumbnails, source) for document, source in sources.items()}
+                thumbnails = {document: document._get_thumbnails(job.result) for document, job in jobs.items()}
+        else:
+            thumbnails = {
+                document: document._get_thumbnails(partial(make_thumbnails, source))
+                for document, source in sources.items()
+            }
+        for document in self:
+            if not thumbnails.get(document):
+                document.portal_thumbnail_state = "none"
+                continue
+            document.write({
+                **{f"portal_thumbnail_{name}": base64.b64encode(data) for name, data in thumbnails[document].items()},
+                "portal_thumbnail_unique": hashlib.sha1(sources[document], usedforsecurity=False).hexdigest()[:16],
+                "portal_thumbnail_state": "done",
+            })
+
+    def _get_thumbnails(self, compute):
+        try:
+            return compute()
+        except (OSError, ValueError, Image.DecompressionBombError):  # e.g. SVG or corrupted images, served as uploaded
+            _logger.info("Cannot generate the thumbnails of document %s", self.id, exc_info=True)
+            return None
+
+    @api.model
+    def _cron_generate_thumbnail_variants(self, batch_size=50, workers=0):
+        while documents := self.with_context(active_test=False).search(
+            [("portal_thumbnail_state", "=", "pending")], limit=batch_size
+        ):
+            documents._generate_thumbnail_variants(workers=workers)
+            self.env.cr.commit()
+
+    def _get_thumbnail_url(self, variant="card"):
+        """Return the content-hashed URL of a thumbnail variant, served as immutable."""
+        self.ensure_one()
+        return f"/document/thumbnail/{self.id}/{variant}/{self.portal_thumbnail_unique}"
+
+    def _get_card_image_url(self):
+        """Return the URL of the image shown on the listing card of ``self``, or ``None``.
+
+        Mirrors the ``document_image_preview`` template, without loading any
+        image to know whether it exists.
+        """
+        self.ensure_one()
+        if self.type == "url":
+            if self.thumbnail_status == "present":
+                return f"/documents/image/{self.id}?field=thumbnail&unique={(self.checksum or '')[-8:]}"
+            if video_token := self._get_youtube_url_token():
+                return f"https://img.youtube.com/vi/{video_token}/0.jpg"
+            return self.url_preview_image or None
+        if self.portal_thumbnail_state == "done":
+            return self._get_thumbnail_url("card")
+        if self.with_context(bin_size=True).portal_thumbnail:
+            return f"/documents/image/{self.id}?field=portal_thumbnail"
+        if self.thumbnail_status == "present" or (self.mimetype or "").startswith("image/"):
+            return f"/documents/image/{self.id}?field=thumbnail"
+        return None
+
+    def _get_listing_cards(self):
+        """Return the compact card values of ``self`` sent by the JSON listing, safe to share between requests."""
+
+        def snippet(text, size=250):
+            return text[:size] + ("..." if len(text) > size else "")
+
+        return [
+            {
+                "id": document.id,
+                "name": document.name,
+                "url": f"/document/{document.id}",
+                "image_url": document._get_card_image_url(),
+                "mimetype": document.mimetype,
+                "categories": document.document_category_ids.mapped("name"),
+                "rating_avg": round(document.rating_avg, 1),
+                "rating_count": document.rating_count,
+                "description": snippet(document.doc_description or ""),
+            }
+            for document in self
+        ]
+
+    def _get_download_filename(self):
+        """Return the name ``self`` is downloaded as, with the extension of its content."""
+        self.ensure_one()
+        filename = self.name
+        if self.content_extension and not filename.lower().endswith(f".{self.content_extension}"):
+            filename = f"{filename}.{self.content_extension}"
+        return filename
+
+    def _get_bundle_entries(self):
+        """Return the members of a ZIP bundle of ``self``, as ``(name, source, size)`` for ``iter_zip``.
+
+        Everything is read from the database here, as the archive is built
+        once the request cursor is closed: files are given by their path in
+        the filestore, and only the ones stored in the database by content.
+        Names are made unique within the bundle.
+        """
+        entries = []
+        names = set()
+        for document in self:
+            attachment = document.attachment_id
+            filename = stem_filename = document._get_download_filename()
+            copy = 1
+            while filename.lower() in names:
+                copy += 1
+                stem, extension = os.path.splitext(stem_filename)
+                filename = f"{stem} ({copy}){extension}"
+            names.add(filename.lower())
+            if attachment.store_fname:
+                source = attachment._full_path(attachment.store_fname)
+            else:
+                source = attachment.raw or b""
+            entries.append((filename, source, attachment.file_size))
+        return entries
+
+    def _record_hits(self, kind):
+        """Count a click or download on ``self`` without writing the documents.
+
+        The hits are buffered and folded into the stored counters by a cron,
+        so the counters are eventually consistent and ``write_date`` is kept.
+        They are also logged as analytics events, for the daily statistics.
+        """
+        self.env["document.counter.buffer"].sudo()._record(self, kind)
+        self.env["document.analytics.event"].sudo()._record(self, kind)
+
     def _get_youtube_url_token(self):
-        if not self.url:
-            return False
-        pattern = re.compile(r"(?:youtu\.be/|youtube\.com/(?:watch\?v=|embed/|v/))([a-zA-Z0-9_-]{11})")
-        match = pattern.search(self.url)
-        return match.group(1) if match else False
+        return youtube_token(self.url)
+
+    def _compute_name_and_preview(self):
+        """Take the title and image of linked pages from the preview cache, never from the network.
+
+        Links whose preview is not cached keep their values until the cron
+        fetches it, so that saving a link never waits on a third-party site.
+        """
+        links = self.filtered(lambda document: not document.attachment_id and document.url)
+        super(Documents, self - links)._compute_name_and_preview()
+        previews = self.env["document.url.preview"].sudo()._get_cached(links.mapped("url"))
+        for document in links:
+            preview = previews.get(normalize_url(document.url))
+            document.name = (preview and preview.title) or document.name
+            document.url_preview_image = (preview and preview.image_url) or document.url_preview_image
+
+    @api.model
+    def _trigger_url_preview_fetch(self):
+        cron = self.env.ref("carbongold_document_management.ir_cron_fetch_url_previews", raise_if_not_found=False)
+        if cron:
+            cron._trigger()
+
+    def _apply_url_preview(self, preview):
+        """Set the title and image of the fetched ``preview`` on the link documents ``self``."""
+        vals = {"url_preview_state": preview.state}
+        if preview.title:
+            vals["name"] = preview.title
+        if preview.image_url:
+            vals["url_preview_image"] = preview.image_url
+        self.write(vals)
+
+    @api.model
+    def _cron_fetch_url_previews(self, batch_size=50):
+        """Resolve the previews of the pending link documents, fetching the pages not cached yet."""
+        Preview = self.env["document.url.preview"].sudo()
+        while documents := self.with_context(active_test=False).search(
+            [("url_preview_state", "=", "pending")], limit=batch_size
+        ):
+            previews = Preview._get_previews(documents.mapped("url"))
+            for document in documents:
+                if not document.url:
+                    document.url_preview_state = False
+                elif preview := previews.get(normalize_url(document.url)):
+                    document._apply_url_preview(preview)
+                else:
+                    # invalid URLs cannot be fetched, nor block the documents after them
+                    document.url_preview_state = "failed"
+            self.env.cr.commit()
 
     def action_view_documents_form(self):
         self.ensure_one()
@@ -96,6 +1250,6 @@ class Documents(models.Model):
             "type": "ir.actions.act_window",
             "view_mode": "form",
             "res_model": "documents.document",
-            "view_id": self.env.ref("documents.document_view_form", False).id,
+            "view_id": self.env.ref("documents.document_view_form", raise_if_not_found=False).id,
             "res_id": self.id,
         }
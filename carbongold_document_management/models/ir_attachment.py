@@ -0,0 +1,154 @@
+# Part of Odoo. See LICENSE file for full copyright and licensing details.
+
+import hashlib
+import logging
+import os
+import shutil
+from datetime import timedelta
+
+from odoo import api, fields, models, tools
+
+
+_logger = logging.getLogger(__name__)
+
+# size of the blocks files are hashed by, so that no file is ever held whole in memory
+HASH_BLOCK_SIZE = 1024 * 1024
+
+# hours a review attachment may stay pending, not linked to any review, unless configured otherwise
+DEFAULT_PENDING_REVIEW_ATTACHMENT_TTL_HOURS = 24
+
+
+class IrAttachment(models.Model):
+    _inherit = "ir.attachment"
+
+    def init(self):
+        super().init()
+        # review attachments are uploaded pending (res_id = 0) until their review is submitted
+        tools.create_index(
+            self.env.cr,
+            "ir_attachment_review_pending_index",
+            self._table,
+            ["create_date"],
+            where="res_model = 'document.review' AND res_id = 0",
+        )
+
+    @api.model
+    def _create_from_paths(self, vals_list, paths):
+        """Create attachments whose content lies in the temporary files at ``paths``.
+
+        With the file storage, the files are moved into the filestore under
+        their SHA-1 without ever being loaded in memory, and the values the
+        ORM computes from the content are set in one query. The files are
+        consumed either way.
+
+        :param vals_list: values of the attachments, without their content
+        :param paths: path of the content of each attachment, in the same order
+        """
+        if self._storage() != "file":
+            for vals, path in zip(vals_list, paths, strict=True):
+                with open(path, "rb") as file:
+                    vals["raw"] = file.read()
+                os.unlink(path)
+            return self.create(vals_list)
+
+        stored = []
+        for path in paths:
+            sha1 = hashlib.sha1(usedforsecurity=False)  # the filestore addresses files by SHA-1
+            with open(path, "rb") as file:
+                while block := file.read(HASH_BLOCK_SIZE):
+                    sha1.update(block)
+            checksum = sha1.hexdigest()
+            fname = f"{checksum[:2]}/{checksum}"
+            full_path = self._full_path(fname)
+            size = os.path.getsize(path)
+            if os.path.exists(full_path):
+                os.unlink(path)
+            else:
+                os.makedirs(os.path.dirname(full_path), exist_ok=True)
+                # a rename on the same volume, a copy otherwise
+                shutil.move(path, full_path)
+            # the file is collected by the filestore garbage collection if the transaction fails
+            self._mark_for_gc(fname)
+            stored.append((fname, size, checksum))
+
+        attachments = self.create(vals_list)
+        fnames, sizes, checksums = (list(column) for column in zip(*stored, strict=True))
+        self.env.cr.execute(
+            """
+            UPDATE ir_attachment attachment
+               SET store_fname = content.fname, file_size = content.size, checksum = content.checksum
+              FROM (
+                SELECT unnest(%s::int[]) AS id, unnest(%s::varchar[]) AS fname,
+                       unnest(%s::int[]) AS size, unnest(%s::varchar[]) AS checksum
+              ) content
+             WHERE attachment.id = content.id
+            """,
+            [attachments.ids, fnames, sizes, checksums],
+        )
+        attachments.invalidate_recordset(["store_fname", "file_size", "checksum"])
+        return attachments
+
+    @api.model
+    def _gc_pending_review_attachments(self, batch_size=500, auto_commit=False):
+        """Delete the review attachments left pending past their TTL, ``batch_size`` at a time.
+
+        Their files are removed from the filestore by its own garbage
+        collection, unless other attachments share them.
+
+        :return: dict with the ``count`` of deleted attachments and the bytes
+            freed, as ``reclaimed_bytes``: the files still referenced by other
+            attachments are not counted
+        """
+        ttl = int(
+            self.env["ir.config_parameter"]
+            .sudo()
+            .get_param(
+                "carbongold_document_management.review_attachment_ttl_hours",
+                DEFAULT_PENDING_REVIEW_ATTACHMENT_TTL_HOURS,
+            )
+        )
+        limit_date = fields.Datetime.now() - timedelta(hours=ttl)
+        count = reclaimed_bytes = 0
+        while True:
+            self.env.cr.execute(
+                """
+                SELECT id, store_fname, COALESCE(file_size, 0)
+                  FROM ir_attachment
+                 WHERE res_model = 'document.review' AND res_id = 0 AND create_date < %s
+              ORDER BY create_date
+                 LIMIT %s
+                   FOR UPDATE SKIP LOCKED
+                """,
+                [limit_date, batch_size],
+            )
+            rows = self.env.cr.fetchall()
+            if not rows:
+                break
+            self.sudo().browse([row[0] for row in rows]).unlink()
+            count += len(rows)
+            # the filestore deduplicates files by checksum: count each file once, and only if unreferenced now
+            sizes = {fname or attachment_id: size for attachment_id, fname, size in rows}
+            fnames = [fname for _id, fname, _size in rows if fname]
+            if fnames:
+                self.env.cr.execute(
+                    "SELECT DISTINCT store_fname FROM ir_attachment WHERE store_fname IN %s", [tuple(fnames)]
+                )
+                for (fname,) in self.env.cr.fetchall():
+                    sizes.pop(fname)
+            reclaimed_bytes += sum(sizes.values())
+            if auto_commit:
+                self.env.cr.commit()
+            if len(rows) < batch_size:
+                break
+        if count:
+            _logger.info(
+                "Deleted %d pending review attachments older than %s hours, reclaiming %d bytes",
+                count,
+                ttl,
+                reclaimed_bytes,
+            )
+        return {"count": count, "reclaimed_bytes": reclaimed_bytes}
+
+    @api.model
+    def _cron_gc_pending_review_attachments(self):
+        return self._gc_pending_review_attachments(auto_commit=True)
@@ -0,0 +1,16 @@
+# Part of Odoo. See LICENSE file for full copyright and licensing details.
+
+from odoo import models
+
+
+class IrHttp(models.AbstractModel):
+    _inherit = "ir.http"
+
+    @classmethod
+    def _post_dispatch(cls, response):
+        super()._post_dispatch(response)
+        # the session cookie is set once the page is rendered: a public page
+        # carrying it must not be kept by shared caches, nor served to others
+        cache_control = response.headers.get("Cache-Control", "")
+        if "s-maxage" in cache_control and "Set-Cookie" in response.headers:
+            response.headers["Cache-Control"] = "private, no-cache"
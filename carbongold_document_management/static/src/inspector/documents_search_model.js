@@ -1,6 +1,7 @@
 /** @odoo-module **/
 
 import { DocumentsSearchModel } from "@documents/views/search/documents_search_model";
+import { Domain } from "@web/core/domain";
 import { patch } from '@web/core/utils/patch';
 
 const isCategoryFilter = (s) => s.type === "filter" && s.fieldName === "document_category_ids";
@@ -8,17 +9,22 @@ const isCategoryFilter = (s) => s.type === "filter" && s.fieldName === "document
 
 patch(DocumentsSearchModel.prototype, {
     /**
+     * The categories of the search panel, sorted once per load of the section.
      * @returns {Object[]}
      */
     getCategories() {
         const { values } = this.getSections(isCategoryFilter)[0];
-        return [...values.values()].sort((a, b) => {
-            if (a.group_sequence === b.group_sequence) {
-                return a.sequence - b.sequence;
-            } else {
-                return a.group_sequence - b.group_sequence;
-            }
-        });
+        if (this._sortedCategoryValues !== values || this._sortedCategories.length !== values.size) {
+            this._sortedCategoryValues = values;
+            this._sortedCategories = [...values.values()].sort((a, b) => {
+                if (a.group_sequence === b.group_sequence) {
+                    return a.sequence - b.sequence;
+                } else {
+                    return a.group_sequence - b.group_sequence;
+                }
+            });
+        }
+        return this._sortedCategories;
     },
 
     /**
@@ -28,11 +34,45 @@ patch(DocumentsSearchModel.prototype, {
      * @param {number} x2mCommand command (4 to add a tag, 3 to remove it)
      */
     async updateRecordCategoryId(recordIds, valueId, x2mCommand = 4) {
-        await this.orm.write("documents.document", recordIds, {
-            document_category_ids: [[x2mCommand, valueId]],
+        if (x2mCommand === 3) {
+            await this.updateRecordCategoryIds(recordIds, [], [valueId]);
+        } else {
+            await this.updateRecordCategoryIds(recordIds, [valueId], []);
+        }
+    },
+
+    /**
+     * Adds and removes categories on many records with a single request,
+     * which also returns the new counts of the categories section.
+     * @param {number[]} recordIds
+     * @param {number[]} addIds
+     * @param {number[]} removeIds
+     */
+    async updateRecordCategoryIds(recordIds, addIds, removeIds) {
+        const section = this.getSections(isCategoryFilter)[0];
+        const counts = await this.orm.call("documents.document", "update_categories", [recordIds], {
+            add_category_ids: addIds,
+            remove_category_ids: removeIds,
+            count_domain: section.enableCounters ? this._getCategoryCountDomain(section) : null,
         });
+        for (const value of section.values.values()) {
+            value.__count = counts[value.id] || 0;
+        }
         this.skipLoadClosePreview = true;
         this.trigger("update");
-        await this._reloadSections();  // update the tag count
-    }
+    },
+
+    /**
+     * Domain the counters of the categories section are made on: the search
+     * and the other sections, as when the search panel loads the section.
+     * @param {Object} section
+     * @returns {Array}
+     */
+    _getCategoryCountDomain(section) {
+        return Domain.and([
+            this._getDomain({ withSearchPanel: false }),
+            this._getCategoryDomain(),
+            this._getFilterDomain(section.id),
+        ]).toList();
+    },
 });
@@ -0,0 +1,22 @@
+/** @odoo-module **/
+
+import publicWidget from "@web/legacy/js/public/public_widget";
+
+publicWidget.registry.DocumentBundle = publicWidget.Widget.extend({
+    selector: ".o_documents_bundle",
+    disabledInEditableMode: true,
+    events: {
+        click: "_onClick",
+    },
+
+    _onClick: function () {
+        // the category filters are applied in place: take them from the current URL
+        const params = new URL(window.location.href).searchParams;
+        const url = new URL("/documents/bundle", window.location.origin);
+        params.getAll("category_ids").forEach((categoryId) => url.searchParams.append("category_ids", categoryId));
+        if (params.get("search")) {
+            url.searchParams.set("search", params.get("search"));
+        }
+        this.el.href = url.pathname + url.search;
+    },
+});
@@ -1,13 +1,39 @@
 /** @odoo-module **/
 
 import publicWidget from "@web/legacy/js/public/public_widget";
+import {debounce} from "@web/core/utils/timing";
 
 publicWidget.registry.DocumentCategorySearch = publicWidget.Widget.extend({
     selector: "#doc_category_form",
     events: {
         "change .doc-cat-checkbox": "_onCategoryChange",
     },
+
+    init() {
+        this._super(...arguments);
+        // checking a parent checks all its children, reload the listing once
+        this._reloadListing = debounce(this._reloadListing.bind(this), 100);
+    },
+
+    _reloadListing() {
+        const listing = document.querySelector(".o_documents_listing");
+        if (!listing) {
+            return this.el.submit();
+        }
+        const categoryIds = [...this.el.querySelectorAll(".doc-cat-checkbox:checked")].map((input) =>
+            parseInt(input.value)
+        );
+        listing.dataset.categoryIds = JSON.stringify(categoryIds);
+        const url = new URL(window.location.href);
+        url.pathname = "/documents";
+        url.searchParams.delete("cursor");
+        url.searchParams.delete("category_ids");
+        categoryIds.forEach((categoryId) => url.searchParams.append("category_ids", categoryId));
+        window.history.replaceState(window.history.state, "", url);
+        listing.dispatchEvent(new CustomEvent("documents:reload"));
+    },
+
     _onCategoryChange: function () {
-        this.el.submit();
+        this._reloadListing();
     },
 });
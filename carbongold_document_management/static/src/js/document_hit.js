@@ -0,0 +1,14 @@
+/** @odoo-module **/
+
+import publicWidget from "@web/legacy/js/public/public_widget";
+
+publicWidget.registry.DocumentHit = publicWidget.Widget.extend({
+    selector: "#document_detail[data-document-id]",
+    disabledInEditableMode: true,
+
+    start: function () {
+        // the page may come from a browser or CDN cache: count the view from here
+        navigator.sendBeacon(`/document/hit/${this.el.dataset.documentId}`);
+        return this._super(...arguments);
+    },
+});
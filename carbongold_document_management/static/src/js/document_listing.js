@@ -0,0 +1,112 @@
+/** @odoo-module **/
+
+import publicWidget from "@web/legacy/js/public/public_widget";
+import {renderToElement} from "@web/core/utils/render";
+
+/**
+ * Appends the next pages of the documents listing on scroll, and reloads it
+ * in place when the filters change (see DocumentCategorySearch), from the
+ * compact cards of the JSON listing instead of full page renders.
+ */
+publicWidget.registry.DocumentListing = publicWidget.Widget.extend({
+    selector: ".o_documents_listing",
+    disabledInEditableMode: true,
+    events: {
+        "documents:reload": "_onReload",
+    },
+
+    init() {
+        this._super(...arguments);
+        this.rpc = this.bindService("rpc");
+        this.loading = false;
+    },
+
+    start() {
+        this.el.querySelectorAll(".o_documents_listing_pager").forEach((pager) => pager.remove());
+        this.observer = new IntersectionObserver((entries) => {
+            if (entries.some((entry) => entry.isIntersecting)) {
+                this._loadNextPage();
+            }
+        }, {rootMargin: "400px"});
+        this.observer.observe(this.el.querySelector(".o_documents_listing_sentinel"));
+        return this._super(...arguments);
+    },
+
+    destroy() {
+        this.observer?.disconnect();
+        this._super(...arguments);
+    },
+
+    //--------------------------------------------------------------------------
+    // Private
+    //--------------------------------------------------------------------------
+
+    _hasNextPage() {
+        return Boolean(this.el.dataset.nextCursor || this.el.dataset.nextOffset);
+    },
+
+    async _fetchPage(params) {
+        const result = await this.rpc("/documents/listing", {
+            category_ids: JSON.parse(this.el.dataset.categoryIds || "[]"),
+            search: this.el.dataset.search || "",
+            sort: this.el.dataset.sort || "recent",
+            ...params,
+        });
+        this.el.dataset.nextCursor = result.next_cursor || "";
+        this.el.dataset.nextOffset = result.next_offset ?? "";
+        return result;
+    },
+
+    _renderItems(cards) {
+        return renderToElement("carbongold_document_management.DocumentListingItems", {
+            cards,
+            viewType: this.el.dataset.viewType,
+        });
+    },
+
+    async _loadNextPage() {
+        if (this.loading || !this._hasNextPage()) {
+            return;
+        }
+        this.loading = true;
+        try {
+            const {cards} = await this._fetchPage({
+                cursor: this.el.dataset.nextCursor || null,
+                offset: this.el.dataset.nextOffset || 0,
+            });
+            const items = this.el.querySelector(".o_documents_listing_items");
+            if (items) {
+                items.append(...this._renderItems(cards).children);
+            }
+        } finally {
+            this.loading = false;
+        }
+    },
+
+    //--------------------------------------------------------------------------
+    // Handlers
+    //--------------------------------------------------------------------------
+
+    async _onReload() {
+        this.loading = true;
+        try {
+            const {cards} = await this._fetchPage({});
+            let content;
+            if (cards.length) {
+                content = document.createElement("div");
+                content.className = "pt-3 pt-lg-0 o_documents_listing_content";
+                content.append(this._renderItems(cards));
+            } else {
+                content = renderToElement("carbongold_document_management.DocumentListingEmpty", {
+                    search: this.el.dataset.search,
+                    categoryIds: JSON.parse(this.el.dataset.categoryIds || "[]"),
+                });
+            }
+            this.el.querySelector(".o_documents_listing_content, .o_documents_listing_empty").replaceWith(content);
+        } finally {
+            this.loading = false;
+        }
+        // the sentinel may still be visible when the first page is short
+        this._loadNextPage();
+    },
+});
@@ -22,6 +22,7 @@ export class DocumentReviewComponent extends Component {
 
         this.state = useState({
             reviews: this.props.reviews || [],
+            reviewsCursor: this.props.reviewsCursor || null,
             showReviewForm: false,
             newReview: {
                 comment: "",
@@ -103,6 +104,36 @@ export class DocumentReviewComponent extends Component {
     //     this.state.loading = false;
     // }
 
+    async loadMoreReviews() {
+        if (!this.state.reviewsCursor || this.state.loading) {
+            return;
+        }
+        this.state.loading = true;
+        try {
+            const result = await this.rpc("/document/review/list/" + this.documentId, {
+                cursor: this.state.reviewsCursor,
+            });
+            this.state.reviews.push(...result.reviews);
+            this.state.reviewsCursor = result.next_cursor;
+        } catch {
+            this.notification.add(_t("Error loading reviews"), {type: "danger"});
+        }
+        this.state.loading = false;
+    }
+
+    async loadMoreReplies(review) {
+        try {
+            const result = await this.rpc("/document/review/replies/" + review.id, {
+                cursor: review.replies_cursor,
+            });
+            const loadedIds = new Set(review.replies.map((reply) => reply.id));
+            review.replies.push(...result.replies.filter((reply) => !loadedIds.has(reply.id)));
+            review.replies_cursor = result.next_cursor;
+        } catch {
+            this.notification.add(_t("Error loading replies"), {type: "danger"});
+        }
+    }
+
     toggleReviewForm() {
         if (!this.state.isLoggedIn) {
             window.location.href = "/web/login";
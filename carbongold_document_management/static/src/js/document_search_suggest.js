@@ -0,0 +1,33 @@
+/** @odoo-module **/
+
+import publicWidget from "@web/legacy/js/public/public_widget";
+import {markup} from "@odoo/owl";
+import {escape} from "@web/core/utils/strings";
+import "@website/snippets/s_searchbar/000";
+
+publicWidget.registry.searchBar.include({
+    /**
+     * Suggests documents and categories from the in-memory index of the
+     * server instead of running the generic website search on each key.
+     *
+     * @override
+     */
+    async _fetch() {
+        if (this.searchType !== "document") {
+            return this._super(...arguments);
+        }
+        const params = new URLSearchParams({term: this.$input.val(), limit: this.limit});
+        const response = await fetch(`/documents/suggest?${params}`);
+        const suggestions = await response.json();
+        return {
+            results: suggestions.map((suggestion) => ({
+                name: markup(escape(suggestion.name)),
+                website_url: suggestion.url,
+                _fa: suggestion.type === "category" ? "fa-folder-o" : "fa-file-o",
+            })),
+            results_count: suggestions.length,
+            parts: {name: true, website_url: true},
+            fuzzy_search: false,
+        };
+    },
+});
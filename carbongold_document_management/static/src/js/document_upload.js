@@ -3,7 +3,7 @@
 import publicWidget from "@web/legacy/js/public/public_widget";
 import {_t} from "@web/core/l10n/translation";
 
-const MAX_FILE_SIZE_MB = 63;
+const DEFAULT_CHUNK_SIZE = 8 * 1024 * 1024;
 
 publicWidget.registry.WebsiteDocument = publicWidget.Widget.extend({
     selector: ".website-document",
@@ -13,6 +13,11 @@ publicWidget.registry.WebsiteDocument = publicWidget.Widget.extend({
         "click .saveDocumentBtn": "_onSaveDocument",
     },
 
+    init() {
+        this._super(...arguments);
+        this.rpc = this.bindService("rpc");
+    },
+
     _onChangeAttachmentType(ev) {
         ev.preventDefault();
         const value = ev.target.value;
@@ -68,12 +73,8 @@ publicWidget.registry.WebsiteDocument = publicWidget.Widget.extend({
 
         if (!name) return showError("Please enter the name of the document.");
         if (!categories || JSON.parse(categories).length == 0) return showError("Please select a document category.");
-        if (attachmentType === "file") {
-            if (!file) return showError("Please select a file to upload.");
-            const maxSizeBytes = MAX_FILE_SIZE_MB * 1024 * 1024;
-            if (file.size > maxSizeBytes) {
-                return showError(`File size must not exceed ${MAX_FILE_SIZE_MB} MB.`);
-            }
+        if (attachmentType === "file" && !file) {
+            return showError("Please select a file to upload.");
         }
         if (attachmentType === "link" && !link) {
             return showError("Please provide a valid document link.");
@@ -85,9 +86,7 @@ publicWidget.registry.WebsiteDocument = publicWidget.Widget.extend({
         formData.append("description", description);
         formData.append("attachment_type", attachmentType);
         formData.append("category_ids", categories);
-        if (file) {
-            formData.append("document_file", file);
-        } else if (link) {
+        if (!file && link) {
             formData.append("document_link", link);
         }
 
@@ -98,7 +97,19 @@ publicWidget.registry.WebsiteDocument = publicWidget.Widget.extend({
             formData.append("thumbnail", thumbnail);
         }
 
+        const saveButton = this.el.querySelector(".saveDocumentBtn");
+        saveButton.disabled = true;
         try {
+            if (file) {
+                try {
+                    const uploadId = await this._uploadFile(file, (ratio) => this._setProgress(ratio));
+                    formData.append("upload_id", uploadId);
+                } catch (error) {
+                    // The upload is resumed from where it stopped on the next attempt
+                    this._setProgress(null);
+                    return showError(error.message || "The file could not be uploaded.");
+                }
+            }
             const response = await fetch("/document/save_document", {
                 method: "POST",
                 body: formData,
@@ -115,7 +126,91 @@ publicWidget.registry.WebsiteDocument = publicWidget.Widget.extend({
             if (modal) modal.classList.remove("show");
             this._resetForm();
             showAlert("An error occurred while uploading.", "alert-danger");
+        } finally {
+            saveButton.disabled = false;
+            this._setProgress(null);
+        }
+    },
+
+    /**
+     * Uploads the file in parts, resuming a previous interrupted upload of
+     * the same file if there is one.
+     *
+     * @param {File} file
+     * @param {Function} onProgress called with the uploaded ratio of the file
+     * @returns {Promise<string>} the upload id to give to save_document
+     */
+    async _uploadFile(file, onProgress) {
+        const resumeKey = `carbongold_upload:${file.name}:${file.size}:${file.lastModified}`;
+        let upload = null;
+        const previousUploadId = window.localStorage.getItem(resumeKey);
+        if (previousUploadId) {
+            const status = await this.rpc("/document/upload/status", {upload_id: previousUploadId});
+            if (!status.error) {
+                upload = status;
+            }
+        }
+        if (!upload) {
+            upload = await this.rpc("/document/upload/start", {
+                filename: file.name,
+                size: file.size,
+                mimetype: file.type,
+            });
+            if (upload.error) {
+                throw new Error(upload.error);
+            }
+            window.localStorage.setItem(resumeKey, upload.upload_id);
+        }
+
+        const chunkSize = upload.chunk_size || DEFAULT_CHUNK_SIZE;
+        let received = upload.received;
+        onProgress(received / file.size);
+        while (received < file.size) {
+            const chunk = file.slice(received, received + chunkSize);
+            const formData = new FormData();
+            formData.append("csrf_token", odoo.csrf_token);
+            formData.append("upload_id", upload.upload_id);
+            formData.append("offset", received);
+            const checksum = await this._digest(chunk);
+            if (checksum) {
+                formData.append("checksum", checksum);
+            }
+            formData.append("chunk", chunk, file.name);
+            const response = await fetch("/document/upload/chunk", {method: "POST", body: formData});
+            const result = await response.json();
+            if (result.error) {
+                throw new Error(result.error);
+            }
+            received = result.received;
+            onProgress(received / file.size);
+        }
+        window.localStorage.removeItem(resumeKey);
+        return upload.upload_id;
+    },
+
+    /**
+     * @param {Blob} blob
+     * @returns {Promise<string|null>} the SHA-256 hex digest of the blob, or
+     *  null where WebCrypto is not available (insecure contexts)
+     */
+    async _digest(blob) {
+        if (!window.crypto || !window.crypto.subtle) {
+            return null;
+        }
+        const digest = await window.crypto.subtle.digest("SHA-256", await blob.arrayBuffer());
+        return [...new Uint8Array(digest)].map((byte) => byte.toString(16).padStart(2, "0")).join("");
+    },
+
+    /**
+     * @param {number|null} ratio uploaded part of the file, null to hide the progress bar
+     */
+    _setProgress(ratio) {
+        const progress = this.el.querySelector(".upload-progress");
+        if (!progress) {
+            return;
         }
+        progress.classList.toggle("d-none", ratio === null);
+        progress.querySelector(".progress-bar").style.width = `${Math.round((ratio || 0) * 100)}%`;
     },
 
     _resetForm() {
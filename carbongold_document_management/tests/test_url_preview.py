@@ -0,0 +1,105 @@
+# Part of Odoo. See LICENSE file for full copyright and licensing details.
+
+import threading
+from collections import Counter
+from datetime import timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from odoo import fields
+from odoo.tests import BaseCase, TransactionCase, tagged
+
+from odoo.addons.carbongold_document_management.utils import normalize_url
+
+
+class PreviewHandler(BaseHTTPRequestHandler):
+    """Serve ``/page`` with an Open Graph title and image, and a 404 for anything else."""
+
+    hits = Counter()
+
+    def do_GET(self):  # noqa: N802 (name set by BaseHTTPRequestHandler)
+        path = self.path.split("?")[0]
+        self.hits[path] += 1
+        if path != "/page":
+            self.send_error(404)
+            return
+        body = (
+            b'<html><head><meta property="og:title" content="Page Title"/>'
+            b'<meta property="og:image" content="https://example.com/image.png"/></head></html>'
+        )
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class TestNormalizeUrl(BaseCase):
+    def test_normalize_url(self):
+        self.assertEqual(
+            normalize_url("HTTPS://Example.com:443/page?b=2&utm_source=x&a=1#top"), "https://example.com/page?a=1&b=2"
+        )
+        self.assertEqual(normalize_url("example.com/page"), "http://example.com/page")
+        self.assertEqual(normalize_url("example.com:8080"), "http://example.com:8080/")
+        self.assertFalse(normalize_url("http://example.com:abc/"), "an invalid port makes the URL invalid")
+        self.assertFalse(normalize_url("http:///page"))
+
+
+@tagged("post_install", "-at_install")
+class TestUrlPreview(TransactionCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        server = ThreadingHTTPServer(("127.0.0.1", 0), PreviewHandler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        cls.addClassCleanup(server.server_close)
+        cls.addClassCleanup(server.shutdown)
+        cls.base_url = f"http://127.0.0.1:{server.server_port}"
+        cls.Preview = cls.env["document.url.preview"]
+
+    def setUp(self):
+        super().setUp()
+        PreviewHandler.hits.clear()
+
+    def test_cache_hit(self):
+        url = f"{self.base_url}/page?b=2&a=1"
+        previews = self.Preview._get_previews([url])
+        preview = previews[normalize_url(url)]
+        self.assertEqual(preview.state, "done")
+        self.assertEqual(preview.title, "Page Title")
+        self.assertEqual(preview.image_url, "https://example.com/image.png")
+
+        # the same page, linked another way, is served from the cache
+        previews = self.Preview._get_previews([url, f"{self.base_url}/page?a=1&b=2&utm_source=mail#top"])
+        self.assertEqual(list(previews.values()), [preview])
+        self.assertEqual(PreviewHandler.hits["/page"], 1)
+
+    def test_ttl(self):
+        self.env["ir.config_parameter"].set_param("carbongold_document_management.url_preview_ttl_days", 3)
+        url = f"{self.base_url}/page"
+        preview = self.Preview._get_previews([url])[normalize_url(url)]
+        self.assertAlmostEqual(preview.expire_date, preview.fetch_date + timedelta(days=3), delta=timedelta(seconds=1))
+
+        preview.expire_date = fields.Datetime.now() - timedelta(seconds=1)
+        self.assertFalse(self.Preview._get_cached([url]), "expired previews are not served")
+        self.assertEqual(self.Preview._get_previews([url])[normalize_url(url)], preview)
+        self.assertEqual(PreviewHandler.hits["/page"], 2, "expired previews are fetched again")
+        self.assertGreater(preview.expire_date, fields.Datetime.now())
+
+    def test_negative_cache(self):
+        url = f"{self.base_url}/missing"
+        preview = self.Preview._get_previews([url])[normalize_url(url)]
+        self.assertEqual(preview.state, "failed")
+        self.assertFalse(preview.title)
+        self.assertAlmostEqual(
+            preview.expire_date, preview.fetch_date + timedelta(hours=24), delta=timedelta(seconds=1)
+        )
+
+        self.assertEqual(self.Preview._get_previews([url])[normalize_url(url)], preview)
+        self.assertEqual(PreviewHandler.hits["/missing"], 1, "failed fetches are not retried before they expire")
+
+    def test_invalid_url(self):
+        self.assertEqual(self.Preview._get_previews(["http://127.0.0.1:abc/page"]), {})
+        self.assertFalse(PreviewHandler.hits)
@@ -0,0 +1,8 @@
+# Part of Odoo. See LICENSE file for full copyright and licensing details.
+
+from .cache import TTLCache
+from .cursor import decode_cursor, encode_cursor
+from .image import THUMBNAIL_VARIANTS, make_thumbnails, thumbnail_format
+from .prefix_index import PrefixIndex
+from .url import normalize_url, youtube_token
+from .zip_stream import iter_zip
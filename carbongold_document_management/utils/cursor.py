@@ -0,0 +1,23 @@
+# Part of Odoo. See LICENSE file for full copyright and licensing details.
+
+import base64
+import json
+from datetime import datetime
+
+
+def encode_cursor(*values):
+    """Return an opaque, URL-safe cursor holding ``values``; datetimes are kept in ISO format."""
+    payload = [value.isoformat() if isinstance(value, datetime) else value for value in values]
+    data = json.dumps(payload, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(data).decode().rstrip("=")
+
+
+def decode_cursor(cursor):
+    """Return the list of values held by ``cursor``, or ``None`` if it is malformed."""
+    if not cursor or not isinstance(cursor, str):
+        return None
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+    except ValueError:
+        return None
+    return values if isinstance(values, list) else None
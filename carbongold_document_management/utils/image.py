@@ -0,0 +1,45 @@
+# Part of Odoo. See LICENSE file for full copyright and licensing details.
+
+import io
+
+from PIL import Image, ImageOps, features
+
+
+# thumbnail variants generated for portal documents: name -> bounding box
+THUMBNAIL_VARIANTS = {
+    "card": (260, 160),
+    "detail": (400, 320),
+    "retina": (800, 640),
+}
+
+
+def thumbnail_format():
+    """Return the output format of the thumbnails: WebP when Pillow supports it, JPEG otherwise."""
+    return "WEBP" if features.check("webp") else "JPEG"
+
+
+def make_thumbnails(source, variants=THUMBNAIL_VARIANTS, output_format=None):
+    """Return the thumbnail variants of the image ``source``.
+
+    This is a pure function of its arguments, so it can run in a separate
+    worker process.
+
+    :param bytes source: the raw content of the original image
+    :param dict variants: bounding box of each variant, by name
+    :param str output_format: ``WEBP`` or ``JPEG``, guessed by default
+    :return: dict mapping each variant name to its raw content
+    :raise OSError: when ``source`` is not an image Pillow can read
+    """
+    output_format = output_format or thumbnail_format()
+    image = ImageOps.exif_transpose(Image.open(io.BytesIO(source)))
+    has_alpha = image.mode in ("RGBA", "LA") or (image.mode == "P" and "transparency" in image.info)
+    image = image.convert("RGBA" if has_alpha and output_format == "WEBP" else "RGB")
+
+    thumbnails = {}
+    for name, size in variants.items():
+        variant = image.copy()
+        variant.thumbnail(size, Image.LANCZOS)
+        output = io.BytesIO()
+        variant.save(output, format=output_format, quality=82, optimize=True)
+        thumbnails[name] = output.getvalue()
+    return thumbnails
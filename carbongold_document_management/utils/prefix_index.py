@@ -0,0 +1,66 @@
+# Part of Odoo. See LICENSE file for full copyright and licensing details.
+
+import unicodedata
+from bisect import bisect_left
+
+
+def normalize(text):
+    """Return ``text`` folded for matching: lowercase, without accents and with single spaces."""
+    text = unicodedata.normalize("NFKD", text or "")
+    text = "".join(char for char in text if not unicodedata.combining(char))
+    return " ".join(text.casefold().split())
+
+
+class PrefixIndex:
+    """Immutable index of labels matched by the prefix of any of their words.
+
+    Each label is keyed by every suffix of its normalized words, and the keys
+    are kept in a sorted array: a lookup is a binary search followed by a
+    scan of the matching keys, without any database access.
+    """
+
+    def __init__(self, entries):
+        """
+        :param entries: iterable of ``(label, value)``, the values being
+            returned by :meth:`search` for the matching labels
+        """
+        self._values = []
+        keys = []
+        for label, value in entries:
+            words = normalize(label).split()
+            position = len(self._values)
+            self._values.append(value)
+            keys.extend((" ".join(words[start:]), start, position) for start in range(len(words)))
+        keys.sort()
+        self._keys = [key for key, _start, _position in keys]
+        self._matches = [(start, position) for _key, start, position in keys]
+
+    def __len__(self):
+        return len(self._values)
+
+    def search(self, query, limit=8, max_scan=1000):
+        """Return the values of at most ``limit`` labels matching ``query``.
+
+        Labels starting with ``query`` come first, then those with a later
+        word starting with it, each in alphabetical order.
+
+        :param max_scan: number of matching keys looked at, at most, so that
+            short queries stay as fast as long ones
+        """
+        query = normalize(query)
+        if not query or not limit:
+            return []
+        # position of each matching label -> whether it starts with the query
+        matches = {}
+        first_count = 0
+        index = bisect_left(self._keys, query)
+        end = min(index + max_scan, len(self._keys))
+        while index < end and first_count < limit and self._keys[index].startswith(query):
+            start, position = self._matches[index]
+            index += 1
+            if start == 0:
+                first_count += 1
+            matches[position] = matches.get(position) or start == 0
+        first = [position for position, is_first in matches.items() if is_first]
+        other = [position for position, is_first in matches.items() if not is_first]
+        return [self._values[position] for position in (first + other)[:limit]]
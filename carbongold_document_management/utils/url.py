@@ -0,0 +1,53 @@
+# Part of Odoo. See LICENSE file for full copyright and licensing details.
+
+import re
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+
+YOUTUBE_URL_PATTERN = re.compile(r"(?:youtu\.be/|youtube\.com/(?:watch\?v=|embed/|v/))([a-zA-Z0-9_-]{11})")
+
+# query parameters that only track where a link was shared, and never change the page
+TRACKING_PARAMETERS = {"fbclid", "gclid", "mc_cid", "mc_eid", "si"}
+
+DEFAULT_PORTS = {"http": 80, "https": 443}
+
+# start of the URLs with a scheme, the others being taken as ``host/path``
+SCHEME_PATTERN = re.compile(r"^[a-zA-Z][a-zA-Z0-9+.-]*://")
+
+
+def normalize_url(url):
+    """Return ``url`` reduced to the resource it points to, so that links to the same page compare equal.
+
+    The scheme and host are lowercased, the default port, the fragment and
+    the tracking parameters (``utm_*`` and the like) are dropped, and the
+    remaining query parameters are sorted. URLs without scheme, such as
+    ``example.com/page``, are taken as HTTP ones.
+
+    :return: the normalized URL, or ``False`` when ``url`` has no host or an invalid port
+    """
+    url = (url or "").strip()
+    if not SCHEME_PATTERN.match(url):
+        url = f"//{url.lstrip('/')}"
+    parts = urlsplit(url)
+    try:
+        port = parts.port
+    except ValueError:  # e.g. http://example.com:abc/
+        return False
+    if not parts.hostname:
+        return False
+    scheme = parts.scheme.lower() or "http"
+    host = parts.hostname.lower()
+    if port and port != DEFAULT_PORTS.get(scheme):
+        host = f"{host}:{port}"
+    query = sorted(
+        (key, value)
+        for key, value in parse_qsl(parts.query, keep_blank_values=True)
+        if not key.startswith("utm_") and key not in TRACKING_PARAMETERS
+    )
+    return urlunsplit((scheme, host, parts.path or "/", urlencode(query), ""))
+
+
+def youtube_token(url):
+    """Return the id of the YouTube video ``url`` links to, or ``False``."""
+    match = YOUTUBE_URL_PATTERN.search(url or "")
+    return match.group(1) if match else False
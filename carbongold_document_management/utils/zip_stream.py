@@ -0,0 +1,77 @@
+# Part of Odoo. See LICENSE file for full copyright and licensing details.
+
+import contextlib
+import io
+import time
+import zipfile
+
+
+# extensions of the files that are compressed already: deflating them again costs CPU for nothing
+COMPRESSED_EXTENSIONS = {
+    ".docx",
+    ".pptx",
+    ".xlsx",
+    ".jpg",
+    ".jpeg",
+    ".png",
+    ".webp",
+    ".zip",
+}
+
+# size of the blocks read from the files, which bounds the memory a bundle takes
+ZIP_BLOCK_SIZE = 256 * 1024
+
+
+class _ChunkBuffer:
+    """Write-only, unseekable sink collecting what the ZIP writer outputs until it is drained."""
+
+    def __init__(self):
+        self._chunks = []
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def drain(self):
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def iter_zip(entries, block_size=ZIP_BLOCK_SIZE):
+    """Yield the bytes of a ZIP archive of ``entries`` as it is built.
+
+    The sink is unseekable, so the sizes and checksum of each member follow
+    its data, and nothing but the block being written is held in memory.
+    Files with an extension of :data:`COMPRESSED_EXTENSIONS` are stored as
+    they are, the others are deflated.
+
+    :param entries: iterable of ``(name, source, size)``, ``name`` being the
+        unique name of the member in the archive, ``source`` the path of the
+        file to read or its content as bytes, and ``size`` its expected size,
+        which decides on ZIP64 extensions
+    """
+    sink = _ChunkBuffer()
+    with zipfile.ZipFile(sink, mode="w", allowZip64=True) as archive:
+        for name, source, size in entries:
+            info = zipfile.ZipInfo(name, date_time=time.localtime()[:6])
+            info.external_attr = 0o644 << 16
+            info.file_size = size
+            extension = name[name.rfind(".") :].lower() if "." in name else ""
+            info.compress_type = zipfile.ZIP_STORED if extension in COMPRESSED_EXTENSIONS else zipfile.ZIP_DEFLATED
+            with contextlib.ExitStack() as stack:
+                if isinstance(source, bytes):
+                    file = stack.enter_context(io.BytesIO(source))
+                else:
+                    file = stack.enter_context(open(source, "rb"))
+                member = stack.enter_context(archive.open(info, mode="w"))
+                while block := file.read(block_size):
+                    member.write(block)
+                    if data := sink.drain():
+                        yield data
+            if data := sink.drain():
+                yield data
+    yield sink.drain()